@@ -1,7 +1,16 @@
+{#
+    Latest row per partition_key.
+
+    With watermark_column, incremental runs only rank the keys that have
+    bronze rows at or after the model's current watermark, using every
+    bronze row of those keys, so an older row can still win. The model
+    merges the result on its unique_key; unchanged keys are not touched.
+#}
 {% macro deduplicate_latest(
     source_relation,
     partition_key,
-    order_by_clause
+    order_by_clause,
+    watermark_column = none
 ) %}
 
 with ranked as (
@@ -12,6 +21,13 @@ with ranked as (
             order by {{ order_by_clause }}
         ) as rn
     from {{ source_relation }}
+    {% if watermark_column is not none and is_incremental() %}
+    where {{ partition_key }} in (
+        select {{ partition_key }}
+        from {{ source_relation }}
+        {{ incremental_ingestion_filter(watermark_column) }}
+    )
+    {% endif %}
 )
 
 select *
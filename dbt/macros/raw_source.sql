@@ -0,0 +1,12 @@
+{% macro raw_source(table_name) %}
+{% if var("raw_file_format", "csv") == "parquet" %}
+read_parquet(
+    '{{ var("raw_data_path") }}/{{ table_name }}/*/*.parquet',
+    hive_partitioning = true
+)
+{% else %}
+read_csv_auto(
+    '{{ var("raw_data_path") }}/{{ table_name }}.csv'
+)
+{% endif %}
+{% endmacro %}
@@ -12,7 +12,5 @@ select
     closed_at,
     ingestion_date,
     current_timestamp as bronze_loaded_at
-from read_csv_auto(
-    '{{ var("raw_data_path") }}/accounts.csv'
-)
+from {{ raw_source("accounts") }}
 {{ incremental_ingestion_filter("ingestion_date") }}
@@ -13,7 +13,5 @@ select
     created_at,
     ingestion_date,
     current_timestamp as bronze_loaded_at
-from read_csv_auto(
-    '{{ var("raw_data_path") }}/customers.csv'
-)
+from {{ raw_source("customers") }}
 {{ incremental_ingestion_filter("ingestion_date") }}
@@ -12,8 +12,6 @@ select
     attempted_at,
     ingestion_date,
     current_timestamp as bronze_loaded_at
-from read_csv_auto(
-    '{{ var("raw_data_path") }}/payments.csv'
-)
+from {{ raw_source("payments") }}
 {{ incremental_ingestion_filter("ingestion_date") }}
 
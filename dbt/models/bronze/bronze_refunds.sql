@@ -11,7 +11,5 @@ select
     refunded_at,
     ingestion_date,
     current_timestamp as bronze_loaded_at
-from read_csv_auto(
-    '{{ var("raw_data_path") }}/refunds.csv'
-)
+from {{ raw_source("refunds") }}
 {{ incremental_ingestion_filter("ingestion_date") }}
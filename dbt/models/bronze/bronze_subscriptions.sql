@@ -12,8 +12,6 @@ select
     end_date,
     ingestion_date,
     current_timestamp as bronze_loaded_at
-from read_csv_auto(
-    '{{ var("raw_data_path") }}/subscriptions.csv'
-)
+from {{ raw_source("subscriptions") }}
 {{ incremental_ingestion_filter("ingestion_date") }}
 
@@ -17,8 +17,6 @@ select
     card_last_four,
     device_id,
     current_timestamp as bronze_loaded_at
-from read_csv_auto(
-    '{{ var("raw_data_path") }}/transactions.csv'
-)
+from {{ raw_source("transactions") }}
 {{ incremental_ingestion_filter("ingestion_date") }}
 
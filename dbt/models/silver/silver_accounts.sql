@@ -1,5 +1,7 @@
 {{ config(
-    materialized = "table"
+    materialized = "incremental",
+    unique_key = "account_id",
+    incremental_strategy = "merge"
 ) }}
 
 select
@@ -21,6 +23,7 @@ from (
     {{ deduplicate_latest(
         ref("bronze_accounts"),
         "account_id",
-        "ingestion_date desc"
+        "ingestion_date desc",
+        "ingestion_date"
     ) }}
 )
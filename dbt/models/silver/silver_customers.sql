@@ -1,5 +1,7 @@
 {{ config(
-    materialized = "table"
+    materialized = "incremental",
+    unique_key = "customer_id",
+    incremental_strategy = "merge"
 ) }}
 
 select
@@ -19,6 +21,7 @@ from (
     {{ deduplicate_latest(
         ref("bronze_customers"),
         "customer_id",
-        "ingestion_date desc"
+        "ingestion_date desc",
+        "ingestion_date"
     ) }}
 )
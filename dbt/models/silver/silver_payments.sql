@@ -1,29 +1,9 @@
 {{ config(
-    materialized = "table"
+    materialized = "incremental",
+    unique_key = "transaction_id",
+    incremental_strategy = "merge"
 ) }}
 
-with ranked_payments as (
-    select
-        payment_id,
-        transaction_id,
-        payment_method,
-        status,
-        attempt_number,
-        attempted_at,
-        ingestion_date,
-
-        row_number() over (
-            partition by transaction_id
-            order by
-                case
-                    when status = 'success' then 1
-                    else 2
-                end,
-                attempted_at desc
-        ) as rn
-    from {{ ref("bronze_payments") }}
-)
-
 select
     payment_id,
     transaction_id,
@@ -33,5 +13,11 @@ select
     attempted_at,
     ingestion_date,
     current_timestamp as silver_loaded_at
-from ranked_payments
-where rn = 1
+from (
+    {{ deduplicate_latest(
+        ref("bronze_payments"),
+        "transaction_id",
+        "case when status = 'success' then 1 else 2 end, attempted_at desc, payment_id",
+        "ingestion_date"
+    ) }}
+)
@@ -1,5 +1,7 @@
 {{ config(
-    materialized = "table"
+    materialized = "incremental",
+    unique_key = "refund_id",
+    incremental_strategy = "merge"
 ) }}
 
 select
@@ -14,6 +16,7 @@ from (
     {{ deduplicate_latest(
         ref("bronze_refunds"),
         "refund_id",
-        "ingestion_date desc"
+        "ingestion_date desc",
+        "ingestion_date"
     ) }}
 )
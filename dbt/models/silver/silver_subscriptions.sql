@@ -1,5 +1,7 @@
 {{ config(
-    materialized = "table"
+    materialized = "incremental",
+    unique_key = "subscription_id",
+    incremental_strategy = "merge"
 ) }}
 
 select
@@ -15,6 +17,7 @@ from (
     {{ deduplicate_latest(
         ref("bronze_subscriptions"),
         "subscription_id",
-        "ingestion_date desc"
+        "ingestion_date desc",
+        "ingestion_date"
     ) }}
 )
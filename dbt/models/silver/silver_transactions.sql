@@ -1,5 +1,7 @@
 {{ config(
-    materialized = "table"
+    materialized = "incremental",
+    unique_key = "transaction_id",
+    incremental_strategy = "merge"
 ) }}
 
 select
@@ -23,6 +25,7 @@ from (
     {{ deduplicate_latest(
         ref("bronze_transactions"),
         "transaction_id",
-        "ingestion_date desc, created_at desc"
+        "ingestion_date desc, created_at desc",
+        "ingestion_date"
     ) }}
 )
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 import duckdb
 
 from src.agents.config import AgentConfig
+from src.agents.warehouse import columns_by_table, data_stamps, view_names
 
 EMAIL_RE = re.compile(r"[A-Za-z0-9._%+]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 PHONE_RE = re.compile(r"\b(\+?\d[\d\s().-]{7,}\d)\b")
@@ -21,85 +23,208 @@ PII_COLUMN_HINTS = {
     "address",
 }
 
+# bump when the value scan itself changes
+SCAN_VERSION = 3
+
+# part of every fingerprint, so changing the rules rescans every table
+RULES_VERSION = hashlib.sha256(
+    "|".join([str(SCAN_VERSION), EMAIL_RE.pattern, PHONE_RE.pattern, *sorted(PII_COLUMN_HINTS)]).encode("utf-8")
+).hexdigest()[:12]
+
 @dataclass
 class ComplianceResult:
     status: str
     checked_objects: List[str]
     findings: List[Dict[str, Any]]
-
-def run(cfg: AgentConfig) -> ComplianceResult:
-    con = duckdb.connect(str(cfg.duckdb_path))
+    wall_time_ms: Optional[float] = None
+    scanned_objects: List[str] = field(default_factory=list)
+    skipped_objects: List[str] = field(default_factory=list)
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+
+def _fingerprint(cfg: AgentConfig, cols: List[tuple], data_stamp: Optional[str]) -> str:
+    schema_part = ",".join(f"{c}:{t}" for c, t in cols)
+    raw = f"{RULES_VERSION}|{cfg.pii_sample_rows}|{schema_part}|{data_stamp}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+def _load_previous(cfg: AgentConfig) -> Dict[str, Any]:
+    path = cfg.reports_dir / "compliance_report.json"
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+PII_PATTERNS = {"email": EMAIL_RE, "phone": PHONE_RE}
+
+# cheap substring tests DuckDB evaluates before the regex
+PII_PREFILTERS = {"email": "contains({col}, '@')"}
+
+STRING_TYPES = ("VARCHAR", "TEXT", "STRING", "CHAR")
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+def _value_scan_sql(
+    full: str,
+    cols: List[str],
+    sample_rows: Optional[int],
+    example_rows: int,
+    is_view: bool = False,
+) -> str:
+    """
+    One aggregate query per table: for every string column and pattern,
+    the number of matching rows and the rowids of the first example_rows
+    matches, all evaluated by DuckDB's vectorized regexp_matches. Views
+    have no rowid, so their rows are numbered in scan order instead.
+    """
+    row_id = "rowid"
+    source = full
+    if is_view:
+        row_id = "scan_row"
+        source = f"(select *, row_number() over () - 1 as scan_row from {full}) as v"
+    selects = ["count(*) as rows_scanned"]
+    for i, col in enumerate(cols):
+        quoted = _quote(col)
+        for kind, pattern in PII_PATTERNS.items():
+            literal = pattern.pattern.replace("'", "''")
+            cond = f"regexp_matches({quoted}, '{literal}')"
+            if kind in PII_PREFILTERS:
+                cond = f"{PII_PREFILTERS[kind].format(col=quoted)} and {cond}"
+            selects.append(f"count(*) filter (where {cond}) as c{i}_{kind}_hits")
+            selects.append(f"min({row_id}, {example_rows}) filter (where {cond}) as c{i}_{kind}_rows")
+
+    sample = f" using sample reservoir({int(sample_rows)} rows) repeatable (42)" if sample_rows else ""
+    return f"select {', '.join(selects)} from {source}{sample}"
+
+def scan_values(
+    con: duckdb.DuckDBPyConnection,
+    full: str,
+    cols: List[str],
+    sample_rows: Optional[int] = None,
+    example_rows: int = 3,
+    is_view: bool = False,
+) -> Dict[str, Any]:
+    """
+    Email and phone pattern hits per column over all rows, or over a
+    reservoir sample of sample_rows rows. Example rows are rowids, or row
+    numbers for views.
+    """
+    row = con.execute(_value_scan_sql(full, cols, sample_rows, example_rows, is_view)).fetchone()
+    values = iter(row[1:])
+
+    columns: List[Dict[str, Any]] = []
+    for col in cols:
+        entry: Dict[str, Any] = {"column": col}
+        for kind in PII_PATTERNS:
+            hits, rows = next(values), next(values)
+            entry[f"{kind}_hits"] = int(hits)
+            entry[f"{kind}_example_rows"] = sorted(int(r) for r in rows or [])
+        if any(entry[f"{kind}_hits"] for kind in PII_PATTERNS):
+            columns.append(entry)
+
+    return {"rows_scanned": int(row[0]), "sampled": bool(sample_rows), "columns": columns}
+
+def _scan_table(
+    cfg: AgentConfig,
+    con: duckdb.DuckDBPyConnection,
+    full: str,
+    cols: List[tuple],
+    is_view: bool = False,
+) -> List[Dict[str, Any]]:
+    col_names = [c for c, _ in cols]
+    suspicious_cols = [c for c in col_names if c.lower() in PII_COLUMN_HINTS]
+    if suspicious_cols:
+        return [{
+            "object": full,
+            "type": "pii_column_name",
+            "evidence": suspicious_cols,
+            "severity": "fail",
+        }]
+
+    # keys are generated identifiers, not free text
+    scan_cols = [
+        c for c, t in cols
+        if str(t).upper().startswith(STRING_TYPES) and c.lower() != "id" and not c.lower().endswith("_id")
+    ]
+    if not scan_cols:
+        return []
+
+    try:
+        result = scan_values(con, full, scan_cols, cfg.pii_sample_rows, cfg.pii_example_rows, is_view)
+    except Exception as e:
+        return [{
+            "object": full,
+            "type": "scan_error",
+            "evidence": str(e),
+            "severity": "warn",
+        }]
+
+    if not result["columns"]:
+        return []
+    return [{
+        "object": full,
+        "type": "pii_value_pattern",
+        "evidence": {
+            "email_detected": any(c["email_hits"] for c in result["columns"]),
+            "phone_detected": any(c["phone_hits"] for c in result["columns"]),
+            "scanned_columns": scan_cols,
+            **result,
+        },
+        "severity": "warn",
+    }]
+
+def run(
+    cfg: AgentConfig,
+    con: Optional[duckdb.DuckDBPyConnection] = None,
+    incremental: Optional[bool] = None,
+) -> ComplianceResult:
+    """
+    Scans every table in the Gold and Platinum schemas for PII.
+
+    In incremental mode (cfg.compliance_incremental, or incremental=True) a
+    table is only rescanned when its fingerprint differs from the one in
+    the previous compliance_report.json. The fingerprint covers the column
+    names and types, the row count, max(*_loaded_at), the rule set and
+    the sample size.
+    Unchanged tables keep their findings from the previous report.
+    """
+    owns_con = con is None
+    if con is None:
+        con = duckdb.connect(str(cfg.duckdb_path))
+    if incremental is None:
+        incremental = cfg.compliance_incremental
 
     schemas_to_check = [cfg.gold_schema, "main_platinum"]
     findings: List[Dict[str, Any]] = []
     checked: List[str] = []
-
-    for schema in schemas_to_check:
-        tables = con.execute(
-            f"""
-            select table_name
-            from information_schema.tables
-            where table_schema = '{schema}'
-            """
-        ).fetchall()
-
-        for (table_name,) in tables:
-            full = f"{schema}.{table_name}"
-            checked.append(full)
-
-            cols = con.execute(
-                f"""
-                select column_name
-                from information_schema.columns
-                where table_schema = '{schema}'
-                  and table_name = '{table_name}'
-                """
-            ).fetchall()
-            col_names = [c[0] for c in cols]
-
-            suspicious_cols = [c for c in col_names if c.lower() in PII_COLUMN_HINTS]
-            if suspicious_cols:
-                findings.append({
-                    "object": full,
-                    "type": "pii_column_name",
-                    "evidence": suspicious_cols,
-                    "severity": "fail",
-                })
-                continue
-
-            sample_cols = [c for c in col_names if "id" not in c.lower()][:6]
-            if not sample_cols:
-                continue
-
-            try:
-                sample = con.execute(
-                    f"select {', '.join(sample_cols)} from {full} limit 200"
-                ).fetchall()
-                joined = " ".join(str(x) for row in sample for x in row if x is not None)
-
-                email_hit = EMAIL_RE.search(joined) is not None
-                phone_hit = PHONE_RE.search(joined) is not None
-
-                if email_hit or phone_hit:
-                    findings.append({
-                        "object": full,
-                        "type": "pii_value_pattern",
-                        "evidence": {
-                            "email_detected": email_hit,
-                            "phone_detected": phone_hit,
-                            "sampled_columns": sample_cols,
-                        },
-                        "severity": "warn",
-                    })
-            except Exception as e:
-                findings.append({
-                    "object": full,
-                    "type": "scan_error",
-                    "evidence": str(e),
-                    "severity": "warn",
-                })
-
-    con.close()
+    scanned: List[str] = []
+    skipped: List[str] = []
+
+    columns = columns_by_table(con, schemas_to_check)
+    stamps = data_stamps(con, columns)
+    views = view_names(con, schemas_to_check)
+    fingerprints = {full: _fingerprint(cfg, cols, stamps.get(full)) for full, cols in columns.items()}
+
+    previous = _load_previous(cfg) if incremental else {}
+    previous_prints: Dict[str, str] = previous.get("fingerprints", {})
+    previous_findings: Dict[str, List[Dict[str, Any]]] = {}
+    for f in previous.get("findings", []):
+        previous_findings.setdefault(f["object"], []).append(f)
+
+    for full, cols in columns.items():
+        checked.append(full)
+        # a table without a data stamp could not be read; always rescan it
+        if full in stamps and previous_prints.get(full) == fingerprints[full]:
+            skipped.append(full)
+            findings.extend(previous_findings.get(full, []))
+            continue
+
+        scanned.append(full)
+        findings.extend(_scan_table(cfg, con, full, cols, full in views))
+
+    if owns_con:
+        con.close()
 
     status = "pass"
     if any(f["severity"] == "fail" for f in findings):
@@ -107,7 +232,14 @@ def run(cfg: AgentConfig) -> ComplianceResult:
     elif findings:
         status = "warn"
 
-    return ComplianceResult(status=status, checked_objects=checked, findings=findings)
+    return ComplianceResult(
+        status=status,
+        checked_objects=checked,
+        findings=findings,
+        scanned_objects=scanned,
+        skipped_objects=skipped,
+        fingerprints=fingerprints,
+    )
 
 def write_report(cfg: AgentConfig, result: ComplianceResult) -> Path:
     cfg.reports_dir.mkdir(parents=True, exist_ok=True)
@@ -2,6 +2,24 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional, Tuple
+
+@dataclass(frozen=True)
+class MonitoredTable:
+    """A table covered by the volume and freshness checks."""
+    table: str
+    date_column: str
+    # defaults to AgentConfig.gold_schema
+    schema: Optional[str] = None
+    # overrides AgentConfig.max_freshness_days, e.g. for monthly grain tables
+    max_freshness_days: Optional[int] = None
+
+DEFAULT_MONITORED_TABLES: Tuple[MonitoredTable, ...] = (
+    MonitoredTable("gold_transaction_facts", "created_at"),
+    MonitoredTable("gold_daily_revenue", "revenue_date"),
+    MonitoredTable("gold_churn", "churn_month", max_freshness_days=62),
+    MonitoredTable("gold_mrr", "revenue_month", max_freshness_days=62),
+)
 
 @dataclass(frozen=True)
 class AgentConfig:
@@ -9,6 +27,11 @@ class AgentConfig:
     dbt_dir: Path = Path("dbt")
     profiles_dir: Path = Path("dbt")
     target: str = "dev"
+    dbt_threads: int = 4
+    # run only tests of models changed since the state saved by the last
+    # validation run, plus tests that failed in it
+    dbt_selective_tests: bool = True
+    dbt_state_dir: Path = Path("artifacts/dbt_state")
 
     reports_dir: Path = Path("artifacts/reports")
     logs_dir: Path = Path("artifacts/logs")
@@ -22,3 +45,28 @@ class AgentConfig:
     max_volume_drop_pct: float = 0.35
     max_volume_spike_pct: float = 0.60
     max_freshness_days: int = 2
+    monitored_tables: Tuple[MonitoredTable, ...] = DEFAULT_MONITORED_TABLES
+
+    # per table counts and finance metrics recorded by each run; checks
+    # compare the latest period to medians over these windows of periods
+    metrics_history_path: Path = Path("artifacts/metrics_history.duckdb")
+    baseline_windows: Tuple[int, ...] = (7, 28)
+    min_baseline_periods: int = 3
+    # recent periods recomputed on every run, to absorb late arriving rows
+    history_restate_days: int = 3
+
+    # only rescan tables whose schema or data changed since the last report
+    compliance_incremental: bool = True
+    # PII value scan: None scans every row, N scans a reservoir sample of N rows
+    pii_sample_rows: Optional[int] = None
+    pii_example_rows: int = 3
+
+    # workflow runner: agents share one read-only DuckDB connection and run
+    # in parallel; dbt test runs alongside them when overlap is on and
+    # dbt_test_target is set, otherwise before them
+    max_parallel_agents: int = 3
+    overlap_dbt_tests: bool = True
+    # target used for the overlapped dbt test; it must open the database
+    # read-only (access_mode READ_ONLY), otherwise the runner retries dbt
+    # test after the agents
+    dbt_test_target: Optional[str] = None
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 import json
+import shutil
 import subprocess
+from concurrent.futures import Future
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 import duckdb
 
-from src.agents.config import AgentConfig
+from src.agents import metrics_history
+from src.agents.config import AgentConfig, MonitoredTable
+from src.agents.warehouse import columns_by_table, data_stamps
 
 @dataclass
 class ValidationResult:
@@ -20,127 +24,308 @@ class ValidationResult:
     volume_checks: List[Dict[str, Any]]
     freshness_checks: List[Dict[str, Any]]
     likely_causes: List[str]
+    wall_time_ms: Optional[float] = None
 
 def _run_cmd(cmd: List[str], cwd: Path) -> subprocess.CompletedProcess:
     return subprocess.run(cmd, cwd=str(cwd), capture_output=True, text=True)
 
-def _run_dbt_tests(cfg: AgentConfig) -> Dict[str, Any]:
+def _dbt_artifacts_dir(cfg: AgentConfig) -> Path:
+    return cfg.repo_root / cfg.dbt_dir / "target"
+
+def _load_json(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def _summarize_run_results(run_results: Dict[str, Any], manifest: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-test status and timing from run_results.json, with the tested model from manifest.json."""
+    nodes = (manifest or {}).get("nodes", {})
+    tests: List[Dict[str, Any]] = []
+    for r in run_results.get("results", []):
+        node = nodes.get(r["unique_id"], {})
+        tests.append({
+            "unique_id": r["unique_id"],
+            "name": node.get("name", r["unique_id"]),
+            "model": node.get("attached_node"),
+            "status": r.get("status"),
+            "failures": r.get("failures"),
+            "execution_time": round(float(r.get("execution_time") or 0.0), 3),
+            "message": r.get("message"),
+        })
+
+    counts: Dict[str, int] = {}
+    for t in tests:
+        counts[t["status"]] = counts.get(t["status"], 0) + 1
+
+    return {
+        "total": len(tests),
+        "by_status": counts,
+        "elapsed_s": round(float(run_results.get("elapsed_time") or 0.0), 3),
+        "failed": [t for t in tests if t["status"] in ("fail", "error", "warn")],
+        "slowest": sorted(tests, key=lambda t: t["execution_time"], reverse=True)[:10],
+    }
+
+def _source_stamps(cfg: AgentConfig) -> Optional[Dict[str, str]]:
+    """Row count and latest load time of every bronze table; None when the database cannot be read."""
+    try:
+        con = duckdb.connect(str(cfg.duckdb_path), read_only=True)
+    except Exception:
+        return None
+    try:
+        return data_stamps(con, columns_by_table(con, [cfg.bronze_schema]))
+    except Exception:
+        return None
+    finally:
+        con.close()
+
+def _merge_run_results(previous: Optional[Dict[str, Any]], current: Dict[str, Any], manifest: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The latest result of every test: a selective run replaces the results
+    of the tests it ran and keeps the others, minus tests no longer in the
+    manifest.
+    """
+    nodes = (manifest or {}).get("nodes", {})
+    by_id = {r["unique_id"]: r for r in (previous or {}).get("results", []) if r["unique_id"] in nodes}
+    by_id.update({r["unique_id"]: r for r in current.get("results", [])})
+    return {**current, "results": list(by_id.values())}
+
+def _save_dbt_state(cfg: AgentConfig, stamps: Optional[Dict[str, str]], artifacts: bool = True) -> None:
+    # the next selective run compares against the project and data as tested now
+    src = _dbt_artifacts_dir(cfg)
+    state = cfg.repo_root / cfg.dbt_state_dir
+    state.mkdir(parents=True, exist_ok=True)
+    if artifacts:
+        manifest = _load_json(src / "manifest.json")
+        run_results = _load_json(src / "run_results.json")
+        if manifest is not None and run_results is not None:
+            merged = _merge_run_results(_load_json(state / "run_results.json"), run_results, manifest)
+            shutil.copyfile(src / "manifest.json", state / "manifest.json")
+            (state / "run_results.json").write_text(json.dumps(merged), encoding="utf-8")
+    if stamps is not None:
+        (state / "source_stamps.json").write_text(json.dumps(stamps, indent=2), encoding="utf-8")
+
+def _dbt_test(cfg: AgentConfig, target: Optional[str], select: Optional[List[str]]) -> Dict[str, Any]:
     started = datetime.utcnow()
     cmd = [
         "dbt",
         "test",
         "--project-dir", str(cfg.dbt_dir),
         "--profiles-dir", str(cfg.profiles_dir),
-        "--target", cfg.target,
+        "--target", target or cfg.target,
+        "--threads", str(cfg.dbt_threads),
     ]
+    if select:
+        cmd += ["--select", *select, "--state", str(cfg.dbt_state_dir)]
+
     p = _run_cmd(cmd, cfg.repo_root)
     finished = datetime.utcnow()
 
-    return {
+    summary: Dict[str, Any] = {
         "command": " ".join(cmd),
         "returncode": p.returncode,
+        "mode": "selective" if select else "full",
         "stdout_tail": p.stdout[-4000:],
         "stderr_tail": p.stderr[-4000:],
         "started_at": started.isoformat() + "Z",
         "finished_at": finished.isoformat() + "Z",
     }
 
-def _volume_and_freshness_checks(cfg: AgentConfig) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
-    con = duckdb.connect(str(cfg.duckdb_path))
+    artifacts = _dbt_artifacts_dir(cfg)
+    run_results = _load_json(artifacts / "run_results.json")
+    # a stale file from an earlier invocation is not this run's result
+    if run_results and run_results.get("metadata", {}).get("generated_at", "") >= started.isoformat():
+        summary["tests"] = _summarize_run_results(run_results, _load_json(artifacts / "manifest.json"))
+    return summary
+
+def _run_dbt_tests(cfg: AgentConfig, target: Optional[str] = None) -> Dict[str, Any]:
+    """
+    dbt test with structured results.
+
+    With cfg.dbt_selective_tests and a state saved by an earlier run, only
+    the tests affected since that run are executed: tests of models changed
+    in the project (state:modified+), tests downstream of every bronze
+    table whose data stamp (row count and latest load time) changed, and
+    tests that failed or errored last time. When that selects nothing the
+    previous results still hold and are reported again with mode
+    "no changes". Afterwards the manifest, the merged run results and the
+    bronze stamps become the new state.
+    """
+    state = cfg.repo_root / cfg.dbt_state_dir
+    stamps = _source_stamps(cfg) if cfg.dbt_selective_tests else None
+    saved_stamps = _load_json(state / "source_stamps.json")
+
+    full_reason: Optional[str] = None
+    if not cfg.dbt_selective_tests:
+        full_reason = "selective tests disabled"
+    elif not (state / "manifest.json").exists() or saved_stamps is None:
+        full_reason = "no saved dbt state"
+    elif stamps is None:
+        full_reason = "source data could not be read"
+
+    if full_reason is not None:
+        summary = _dbt_test(cfg, target, None)
+        summary["full_run_reason"] = full_reason
+        if "tests" in summary:
+            _save_dbt_state(cfg, stamps)
+        return summary
+
+    # stamps are keyed schema.table, and bronze tables are named after their models
+    changed = sorted(full for full, stamp in stamps.items() if saved_stamps.get(full) != stamp)
+    select = ["state:modified+", *(f"{full.split('.', 1)[1]}+" for full in changed)]
+    if (state / "run_results.json").exists():
+        select += ["result:fail", "result:error"]
+
+    summary = _dbt_test(cfg, target, select)
+    summary["changed_sources"] = changed
+    if "tests" not in summary:
+        return summary
+
+    if summary["returncode"] == 0 and summary["tests"]["total"] == 0:
+        summary["mode"] = "no changes"
+        previous = _load_json(state / "run_results.json")
+        if previous is not None:
+            summary["tests"] = _summarize_run_results(previous, _load_json(state / "manifest.json"))
+            summary["reused_results_from"] = previous.get("metadata", {}).get("generated_at")
+        # keep the saved results, an empty run has none to add
+        _save_dbt_state(cfg, stamps, artifacts=False)
+        return summary
+
+    _save_dbt_state(cfg, stamps)
+    return summary
+
+def _daily_counts_sql(cfg: AgentConfig, t: MonitoredTable, since: Optional[date] = None) -> str:
+    full = f"{t.schema or cfg.gold_schema}.{t.table}"
+    where = f"{t.date_column} is not null"
+    if since is not None:
+        # only the periods the history does not have yet, or may have wrong
+        where += f" and {t.date_column} >= date '{since.isoformat()}'"
+    return f"""
+    select '{full}' as tbl, cast({t.date_column} as date) as d, count(*) as n
+    from {full}
+    where {where}
+    group by 2
+    """
+
+def _volume_check(cfg: AgentConfig, t: str, hist: duckdb.DuckDBPyConnection) -> Dict[str, Any]:
+    recent = metrics_history.latest(hist, t, "row_count")
+    if len(recent) < 2:
+        return {"table": t, "status": "skip", "reason": "not enough history"}
+
+    d0, n0 = recent[0]
+    baseline = metrics_history.baselines(hist, t, "row_count", d0, cfg.baseline_windows)
+    if baseline["periods"] < cfg.min_baseline_periods:
+        return {
+            "table": t,
+            "status": "skip",
+            "reason": f"{baseline['periods']} earlier periods recorded, need {cfg.min_baseline_periods}",
+        }
+
+    window = cfg.baseline_windows[0]
+    median = baseline[f"median_{window}"]
+    if not median:
+        return {"table": t, "status": "warn", "reason": f"{window} period median count was 0"}
+
+    pct = (n0 - median) / median
+    status = "pass"
+    if pct < -cfg.max_volume_drop_pct:
+        status = "fail"
+    elif pct > cfg.max_volume_spike_pct:
+        status = "warn"
+
+    return {
+        "table": t,
+        "latest_date": str(d0),
+        "latest_count": int(n0),
+        "prev_date": str(recent[1][0]),
+        "prev_count": int(recent[1][1]),
+        "baseline": baseline,
+        "baseline_window": window,
+        "pct_change": float(pct),
+        "status": status,
+    }
+
+def _freshness_check(cfg: AgentConfig, t: str, max_days: Optional[int], hist: duckdb.DuckDBPyConnection) -> Dict[str, Any]:
+    recent = metrics_history.latest(hist, t, "row_count", 1)
+    if not recent:
+        return {"table": t, "status": "fail", "reason": "no rows"}
+
+    max_dt = recent[0][0]
+    days_old = (date.today() - max_dt).days
+    limit = cfg.max_freshness_days if max_days is None else max_days
+    return {
+        "table": t,
+        "max_date": str(max_dt),
+        "days_old": days_old,
+        "status": "pass" if days_old <= limit else "fail",
+    }
+
+def _volume_and_freshness_checks(
+    cfg: AgentConfig,
+    con: Optional[duckdb.DuckDBPyConnection] = None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Daily counts for every monitored table from one UNION ALL query, which
+    reads only the periods since each table's last recorded one (minus
+    cfg.history_restate_days). The counts go to the metrics history, and
+    volume and freshness are judged from there, against rolling medians.
+    If the query fails, for example on a missing column, each table is
+    queried on its own so only the broken table reports an error.
+    """
+    owns_con = con is None
+    if con is None:
+        con = duckdb.connect(str(cfg.duckdb_path))
+    hist = metrics_history.connect(cfg)
+
+    tables = [(f"{t.schema or cfg.gold_schema}.{t.table}", t) for t in cfg.monitored_tables]
+    since = {name: metrics_history.restate_from(hist, name, "row_count", cfg.history_restate_days) for name, _ in tables}
+    counts: Dict[str, List[tuple]] = {name: [] for name, _ in tables}
+    errors: Dict[str, str] = {}
+
+    try:
+        union = "\n    union all\n".join(_daily_counts_sql(cfg, t, since[name]) for name, t in tables)
+        for tbl, d, n in con.execute(union).fetchall():
+            counts[tbl].append((d, {"row_count": n}))
+    except Exception:
+        for name, t in tables:
+            try:
+                rows = con.execute(_daily_counts_sql(cfg, t, since[name])).fetchall()
+                counts[name] = [(d, {"row_count": n}) for _, d, n in rows]
+            except Exception as e:
+                errors[name] = str(e)
 
     volume_checks: List[Dict[str, Any]] = []
     freshness_checks: List[Dict[str, Any]] = []
+    for name, t in tables:
+        if name in errors:
+            volume_checks.append({"table": name, "status": "error", "error": errors[name]})
+            freshness_checks.append({"table": name, "status": "error", "error": errors[name]})
+            continue
+        metrics_history.record(hist, name, ("row_count",), since[name], counts[name])
+        volume_checks.append(_volume_check(cfg, name, hist))
+        freshness_checks.append(_freshness_check(cfg, name, t.max_freshness_days, hist))
 
-    tables = [
-        f"{cfg.gold_schema}.gold_transaction_facts",
-        f"{cfg.gold_schema}.gold_daily_revenue",
-        f"{cfg.gold_schema}.gold_churn",
-        f"{cfg.gold_schema}.gold_mrr",
-    ]
-
-    for t in tables:
-        try:
-            q = f"""
-            with daily as (
-              select
-                cast(coalesce(transaction_date, revenue_date, churn_date, month) as date) as d,
-                count(*) as n
-              from {t}
-              group by 1
-            ),
-            latest as (
-              select d, n
-              from daily
-              order by d desc
-              limit 2
-            )
-            select * from latest
-            """
-            rows = con.execute(q).fetchall()
-            if len(rows) < 2:
-                volume_checks.append({"table": t, "status": "skip", "reason": "not enough history"})
-                continue
-
-            d0, n0 = rows[0]
-            d1, n1 = rows[1]
-            if n1 == 0:
-                volume_checks.append({"table": t, "status": "warn", "reason": "previous day count was 0"})
-                continue
-
-            pct = (n0 - n1) / n1
-            status = "pass"
-            if pct < -cfg.max_volume_drop_pct:
-                status = "fail"
-            elif pct > cfg.max_volume_spike_pct:
-                status = "warn"
-
-            volume_checks.append({
-                "table": t,
-                "latest_date": str(d0),
-                "latest_count": int(n0),
-                "prev_date": str(d1),
-                "prev_count": int(n1),
-                "pct_change": float(pct),
-                "status": status,
-            })
-
-        except Exception as e:
-            volume_checks.append({"table": t, "status": "error", "error": str(e)})
-
-    for t in tables:
-        try:
-            q = f"""
-            select
-              max(coalesce(transaction_date, revenue_date, churn_date, month)) as max_dt
-            from {t}
-            """
-            max_dt = con.execute(q).fetchone()[0]
-            if max_dt is None:
-                freshness_checks.append({"table": t, "status": "fail", "reason": "no rows"})
-                continue
-
-            q2 = "select current_date"
-            today = con.execute(q2).fetchone()[0]
-            days_old = (today - max_dt).days
-
-            status = "pass" if days_old <= cfg.max_freshness_days else "fail"
-            freshness_checks.append({
-                "table": t,
-                "max_date": str(max_dt),
-                "days_old": int(days_old),
-                "status": status,
-            })
-        except Exception as e:
-            freshness_checks.append({"table": t, "status": "error", "error": str(e)})
-
-    con.close()
+    hist.close()
+    if owns_con:
+        con.close()
     return volume_checks, freshness_checks
 
-def run(cfg: AgentConfig) -> ValidationResult:
+def run(
+    cfg: AgentConfig,
+    con: Optional[duckdb.DuckDBPyConnection] = None,
+    dbt_tests: Optional["Future[Dict[str, Any]]"] = None,
+) -> ValidationResult:
+    """
+    Standalone, runs dbt test and then the SQL checks on its own connection.
+    The workflow runner passes a shared connection and a dbt test already
+    running in the background, so both overlap.
+    """
     started_at = datetime.utcnow().isoformat() + "Z"
 
-    dbt = _run_dbt_tests(cfg)
-    volume_checks, freshness_checks = _volume_and_freshness_checks(cfg)
+    dbt = _run_dbt_tests(cfg) if dbt_tests is None else None
+    volume_checks, freshness_checks = _volume_and_freshness_checks(cfg, con)
+    if dbt is None:
+        dbt = dbt_tests.result()
 
     likely_causes: List[str] = []
     if dbt["returncode"] != 0:
@@ -7,8 +7,11 @@ from typing import Dict, Any, List, Optional
 
 import duckdb
 
+from src.agents import metrics_history
 from src.agents.config import AgentConfig
 
+FINANCE_METRICS = ("net_revenue", "gross_transaction_amount", "total_refunded_amount")
+
 
 @dataclass
 class FinanceInsight:
@@ -18,9 +21,10 @@ class FinanceInsight:
     key_metrics: Dict[str, Any]
     drivers: List[Dict[str, Any]]
     notes: List[str]
+    wall_time_ms: Optional[float] = None
 
 
-def run(cfg: AgentConfig) -> FinanceInsight:
+def run(cfg: AgentConfig, con: Optional[duckdb.DuckDBPyConnection] = None) -> FinanceInsight:
     """
     Deterministic daily finance summary.
 
@@ -33,31 +37,47 @@ def run(cfg: AgentConfig) -> FinanceInsight:
       - gross_transaction_amount
       - total_refunded_amount
       - gold_loaded_at (ignored)
+
+    Only days since the last recorded one (minus cfg.history_restate_days)
+    are read; they are appended to the metrics history, and the latest day
+    is compared to rolling medians from it.
+
+    Opens its own connection unless the workflow runner passes one.
     """
-    con = duckdb.connect(str(cfg.duckdb_path))
+    owns_con = con is None
+    if con is None:
+        con = duckdb.connect(str(cfg.duckdb_path))
+    hist = metrics_history.connect(cfg)
+
+    source = f"{cfg.gold_schema}.gold_daily_revenue"
+    since = metrics_history.restate_from(hist, source, "net_revenue", cfg.history_restate_days)
 
     q = f"""
-    with d as (
-      select *
-      from {cfg.gold_schema}.gold_daily_revenue
-      order by revenue_date desc
-      limit 2
-    )
     select
-      max(case when rn = 1 then revenue_date end) as latest_date,
-      max(case when rn = 1 then net_revenue end) as latest_net,
-      max(case when rn = 2 then net_revenue end) as prev_net,
-      max(case when rn = 1 then gross_transaction_amount end) as latest_gross,
-      max(case when rn = 1 then total_refunded_amount end) as latest_refunds
-    from (
-      select *, row_number() over(order by revenue_date desc) as rn
-      from d
-    )
+      cast(revenue_date as date) as revenue_date,
+      net_revenue,
+      gross_transaction_amount,
+      total_refunded_amount
+    from {source}
+    where revenue_date is not null
     """
+    if since is not None:
+        q += f"  and revenue_date >= date '{since.isoformat()}'\n"
 
-    row = con.execute(q).fetchone()
-    if row is None or row[0] is None:
+    rows = con.execute(q).fetchall()
+    if owns_con:
         con.close()
+    metrics_history.record(
+        hist,
+        source,
+        FINANCE_METRICS,
+        since,
+        [(r[0], dict(zip(FINANCE_METRICS, r[1:]))) for r in rows],
+    )
+
+    recent = metrics_history.latest(hist, source, "net_revenue")
+    if not recent:
+        hist.close()
         return FinanceInsight(
             status="fail",
             as_of_date="unknown",
@@ -67,15 +87,35 @@ def run(cfg: AgentConfig) -> FinanceInsight:
             notes=["gold_daily_revenue missing or empty"],
         )
 
-    latest_date, latest_net, prev_net, latest_gross, latest_refunds = row
+    latest_date, latest_net = recent[0]
+    prev_net = recent[1][1] if len(recent) > 1 else None
+    latest = metrics_history.values_at(hist, source, latest_date)
+    latest_gross = latest.get("gross_transaction_amount")
+    latest_refunds = latest.get("total_refunded_amount")
+    baseline = metrics_history.baselines(hist, source, "net_revenue", latest_date, cfg.baseline_windows)
+    hist.close()
 
     # Compute day-over-day change on net revenue
     pct_change: Optional[float] = None
     if prev_net is not None and float(prev_net) != 0.0:
         pct_change = float((latest_net - prev_net) / prev_net)
 
+    # Change against the median of the shortest baseline window
+    window = cfg.baseline_windows[0]
+    median = baseline[f"median_{window}"]
+    baseline_change: Optional[float] = None
+    if baseline["periods"] >= cfg.min_baseline_periods and median:
+        baseline_change = float((latest_net - median) / median)
+
     # Headline logic
-    if pct_change is not None:
+    if baseline_change is not None:
+        if baseline_change < -0.10:
+            headline = f"Net revenue down {baseline_change:.1%} versus {window} day median"
+        elif baseline_change > 0.10:
+            headline = f"Net revenue up {baseline_change:.1%} versus {window} day median"
+        else:
+            headline = f"Net revenue in line with {window} day median"
+    elif pct_change is not None:
         if pct_change < -0.10:
             headline = f"Net revenue down {pct_change:.1%} versus prior day"
         elif pct_change > 0.10:
@@ -104,11 +144,11 @@ def run(cfg: AgentConfig) -> FinanceInsight:
         "gross_transaction_amount": float(latest_gross),
         "total_refunded_amount": float(latest_refunds),
         "net_revenue_change_pct": pct_change,
+        "net_revenue_baseline": baseline,
+        "net_revenue_change_vs_median_pct": baseline_change,
         "refund_rate_amount_based": refund_rate,
     }
 
-    con.close()
-
     status = "pass"
     if drivers:
         status = "warn"
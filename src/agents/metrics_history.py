@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import duckdb
+
+from src.agents.config import AgentConfig
+
+# One row per source (a table), metric and period (a day, or a month for
+# monthly grain tables). Agents append the periods they recompute on each
+# run, so baselines are read from here instead of rescanning gold tables.
+HISTORY_DDL = """
+create table if not exists metrics_history (
+  source varchar not null,
+  metric varchar not null,
+  period date not null,
+  value double,
+  recorded_at timestamp not null,
+  primary key (source, metric, period)
+)
+"""
+
+def connect(cfg: AgentConfig) -> duckdb.DuckDBPyConnection:
+    """
+    The history lives in its own DuckDB file, not the warehouse, because
+    the workflow runner opens the warehouse read-only. Connections made by
+    agent threads of one process share the same database instance.
+    """
+    cfg.metrics_history_path.parent.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(str(cfg.metrics_history_path))
+    con.execute(HISTORY_DDL)
+    return con
+
+def restate_from(
+    con: duckdb.DuckDBPyConnection,
+    source: str,
+    metric: str,
+    restate_days: int,
+) -> Optional[date]:
+    """
+    First period to recompute for source: the last recorded period minus
+    restate_days, so late rows for recent periods are picked up. None when
+    nothing is recorded yet and the full table has to be read once.
+    """
+    row = con.execute(
+        "select max(period) - cast(? as integer) from metrics_history where source = ? and metric = ?",
+        [restate_days, source, metric],
+    ).fetchone()
+    return row[0] if row else None
+
+def record(
+    con: duckdb.DuckDBPyConnection,
+    source: str,
+    metrics: Tuple[str, ...],
+    since: Optional[date],
+    rows: Iterable[Tuple[date, Dict[str, Any]]],
+) -> int:
+    """
+    Replace the recorded periods of metrics from since onwards (all of them
+    when since is None) with rows of (period, {metric: value}).
+    """
+    recorded_at = datetime.utcnow()
+    values = [
+        (source, m, period, None if by_metric[m] is None else float(by_metric[m]), recorded_at)
+        for period, by_metric in rows
+        for m in metrics
+    ]
+
+    placeholders = ", ".join("?" for _ in metrics)
+    delete = f"delete from metrics_history where source = ? and metric in ({placeholders})"
+    params: List[Any] = [source, *metrics]
+    if since is not None:
+        delete += " and period >= ?"
+        params.append(since)
+
+    con.execute("begin transaction")
+    try:
+        con.execute(delete, params)
+        if values:
+            con.executemany("insert into metrics_history values (?, ?, ?, ?, ?)", values)
+        con.execute("commit")
+    except Exception:
+        con.execute("rollback")
+        raise
+    return len(values)
+
+def latest(con: duckdb.DuckDBPyConnection, source: str, metric: str, n: int = 2) -> List[Tuple[date, Optional[float]]]:
+    """The n most recent (period, value) pairs, newest first."""
+    return con.execute(
+        """
+        select period, value
+        from metrics_history
+        where source = ? and metric = ?
+        order by period desc
+        limit ?
+        """,
+        [source, metric, n],
+    ).fetchall()
+
+def values_at(con: duckdb.DuckDBPyConnection, source: str, period: date) -> Dict[str, Optional[float]]:
+    """Every metric recorded for source in one period."""
+    rows = con.execute(
+        "select metric, value from metrics_history where source = ? and period = ?",
+        [source, period],
+    ).fetchall()
+    return dict(rows)
+
+def baselines(
+    con: duckdb.DuckDBPyConnection,
+    source: str,
+    metric: str,
+    before: date,
+    windows: Tuple[int, ...],
+) -> Dict[str, Any]:
+    """
+    Median of the last w recorded periods before `before`, for each window
+    w, and how many periods the longest window actually had.
+    """
+    medians = ",\n      ".join(f"median(value) filter (where rn <= {int(w)}) as median_{int(w)}" for w in windows)
+    row = con.execute(
+        f"""
+        with h as (
+          select value, row_number() over (order by period desc) as rn
+          from metrics_history
+          where source = ? and metric = ? and period < ?
+        )
+        select
+          count(*) filter (where rn <= {max(int(w) for w in windows)}) as periods,
+          {medians}
+        from h
+        """,
+        [source, metric, before],
+    ).fetchone()
+
+    out: Dict[str, Any] = {"periods": int(row[0])}
+    for w, m in zip(windows, row[1:]):
+        out[f"median_{int(w)}"] = None if m is None else float(m)
+    return out
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Dict, List, Set
+
+import duckdb
+
+# Catalog helpers shared by the agents. A data stamp is a cheap stand-in
+# for a table's contents: its row count plus max(*_loaded_at), which
+# changes whenever a dbt run appends or rewrites rows.
+
+def columns_by_table(con: duckdb.DuckDBPyConnection, schemas: List[str]) -> Dict[str, List[tuple]]:
+    """(column_name, data_type) per schema.table, for all schemas in one query."""
+    placeholders = ", ".join("?" for _ in schemas)
+    rows = con.execute(
+        f"""
+        select table_schema, table_name, column_name, data_type
+        from information_schema.columns
+        where table_schema in ({placeholders})
+        order by table_schema, table_name, ordinal_position
+        """,
+        schemas,
+    ).fetchall()
+
+    columns: Dict[str, List[tuple]] = {}
+    for schema, table_name, column_name, data_type in rows:
+        columns.setdefault(f"{schema}.{table_name}", []).append((column_name, data_type))
+    return columns
+
+def data_stamps(con: duckdb.DuckDBPyConnection, columns: Dict[str, List[tuple]]) -> Dict[str, str]:
+    """Row count plus max(*_loaded_at) where the table has one, for all tables in one query."""
+    parts = []
+    for full, cols in columns.items():
+        loaded = next((c for c, _ in cols if c.lower().endswith("_loaded_at")), None)
+        max_loaded = f"cast(max({loaded}) as varchar)" if loaded else "null"
+        parts.append(f"select '{full}' as obj, count(*) as n, {max_loaded} as max_loaded from {full}")
+    if not parts:
+        return {}
+
+    try:
+        rows = con.execute("\nunion all\n".join(parts)).fetchall()
+    except Exception:
+        # query tables one by one so a single unreadable table, which then
+        # gets no stamp and is rescanned, does not cost the others theirs
+        rows = []
+        for part in parts:
+            try:
+                rows.extend(con.execute(part).fetchall())
+            except Exception:
+                continue
+    return {obj: f"{n}|{max_loaded}" for obj, n, max_loaded in rows}
+
+def view_names(con: duckdb.DuckDBPyConnection, schemas: List[str]) -> Set[str]:
+    """schema.view names in schemas; views have no rowid."""
+    placeholders = ", ".join("?" for _ in schemas)
+    rows = con.execute(
+        f"""
+        select table_schema, table_name
+        from information_schema.tables
+        where table_schema in ({placeholders}) and table_type = 'VIEW'
+        """,
+        schemas,
+    ).fetchall()
+    return {f"{schema}.{table_name}" for schema, table_name in rows}
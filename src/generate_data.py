@@ -1,14 +1,23 @@
+import argparse
+import json
+import shutil
 import uuid
 import random
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from faker import Faker
 
+SEED = 42
+
 fake = Faker()
-Faker.seed(42)
-random.seed(42)
+Faker.seed(SEED)
+random.seed(SEED)
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -310,25 +319,899 @@ def generate_refunds(transactions: pd.DataFrame) -> pd.DataFrame:
 
 
 
-def main():
-    customers = generate_customers(n_customers=1000)
-    accounts = generate_accounts(customers)
-    transactions = generate_transactions(accounts)
-    payments = generate_payments(transactions)
-    subscriptions = generate_subscriptions(customers)
-    refunds = generate_refunds(transactions)
+# ---------------------------------------------------------------------------
+# Vectorized engine
+#
+# Same tables, columns, distributions and duplicate-injection rates as the
+# row-by-row generators above, but every per-row draw is taken as a NumPy
+# array from a single seeded Generator. Faker is only called up front to fill
+# small value pools, which are then sampled by index.
+# ---------------------------------------------------------------------------
 
-    customers.to_csv(RAW_DATA_DIR / "customers.csv", index=False)
-    accounts.to_csv(RAW_DATA_DIR / "accounts.csv", index=False)
-    transactions.to_csv(RAW_DATA_DIR / "transactions.csv", index=False)
-    payments.to_csv(RAW_DATA_DIR / "payments.csv", index=False)
-    subscriptions.to_csv(RAW_DATA_DIR / "subscriptions.csv", index=False)
-    refunds.to_csv(RAW_DATA_DIR / "refunds.csv", index=False)
+CUSTOMER_HISTORY_DAYS = 730
 
+ACCOUNT_TYPES = np.array(["checking", "savings", "credit"])
+ACCOUNT_STATUSES = np.array(["active", "closed", "suspended"])
+ACCOUNT_STATUS_WEIGHTS = [0.7, 0.2, 0.1]
 
-if __name__ == "__main__":
-    main()
+TRANSACTION_STATUSES = np.array(["success", "failed", "pending"])
+TRANSACTION_STATUS_WEIGHTS = [0.85, 0.1, 0.05]
+AMOUNT_BUCKETS_LOW = np.array([1.0, 20.0, 100.0, 500.0])
+AMOUNT_BUCKETS_HIGH = np.array([20.0, 100.0, 500.0, 2000.0])
+
+PAYMENT_METHODS = np.array(["card", "bank"])
+SUBSCRIPTION_PLANS = np.array(["basic", "pro", "enterprise"])
+SUBSCRIPTION_STATUSES = np.array(["active", "paused", "canceled"])
+REFUND_REASONS = np.array(["customer_dispute", "merchant_error", "duplicate_charge"])
+
+_HEX_CHARS = np.frombuffer(b"0123456789abcdef", dtype="S1")
+_UUID_HEX_POSITIONS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+
+
+@dataclass
+class FakerPools:
+    user_names: np.ndarray
+    first_names: np.ndarray
+    last_names: np.ndarray
+    street_addresses: np.ndarray
+    cities: np.ndarray
+    states: np.ndarray
+    postcodes: np.ndarray
+    companies: np.ndarray
+
+
+def build_faker_pools(seed: int = SEED, size: int = 1000) -> FakerPools:
+    pool_fake = Faker()
+    pool_fake.seed_instance(seed)
+
+    def draw(method) -> np.ndarray:
+        return np.array([method() for _ in range(size)])
+
+    return FakerPools(
+        user_names=draw(pool_fake.user_name),
+        first_names=draw(pool_fake.first_name),
+        last_names=draw(pool_fake.last_name),
+        street_addresses=draw(pool_fake.street_address),
+        cities=draw(pool_fake.city),
+        states=draw(pool_fake.state_abbr),
+        postcodes=draw(pool_fake.postcode),
+        companies=draw(pool_fake.company),
+    )
+
+
+def _pick(rng: np.random.Generator, pool: np.ndarray, n: int) -> np.ndarray:
+    return pool[rng.integers(0, len(pool), n)]
+
+
+def _days(values: np.ndarray) -> np.ndarray:
+    return values.astype("timedelta64[D]")
+
+
+def _uuid4_array(rng: np.random.Generator, n: int) -> np.ndarray:
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+
+    nibbles = np.empty((n, 32), dtype=np.uint8)
+    nibbles[:, 0::2] = raw >> 4
+    nibbles[:, 1::2] = raw & 0x0F
+
+    chars = np.full((n, 36), b"-", dtype="S1")
+    chars[:, _UUID_HEX_POSITIONS] = _HEX_CHARS[nibbles]
+    return chars.view("S36").ravel().astype(str)
+
+
+def _uniform_datetimes(
+    rng: np.random.Generator,
+    start: np.ndarray,
+    end: np.datetime64,
+) -> np.ndarray:
+    start = start.astype("datetime64[s]")
+    span = np.maximum((end - start).astype(np.int64), 0)
+    offsets = (rng.random(len(start)) * span).astype(np.int64)
+    return start + offsets.astype("timedelta64[s]")
+
+
+def _group_positions(counts: np.ndarray) -> np.ndarray:
+    starts = np.cumsum(counts) - counts
+    return np.arange(int(counts.sum())) - np.repeat(starts, counts)
+
+
+def _with_duplicates(n: int, dup_mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Row order with each flagged row repeated right after itself, plus copy positions."""
+    order = np.repeat(np.arange(n), 1 + dup_mask.astype(np.int64))
+    original_pos = np.arange(n) + np.cumsum(dup_mask) - dup_mask
+    return order, original_pos[dup_mask] + 1
+
+
+def _as_datetimes(series: pd.Series) -> np.ndarray:
+    return pd.to_datetime(series).to_numpy(dtype="datetime64[s]")
+
+
+def generate_customers_vectorized(
+    n_customers: int,
+    rng: np.random.Generator,
+    pools: FakerPools,
+    as_of: datetime,
+) -> pd.DataFrame:
+    n = n_customers
+    now = np.datetime64(as_of, "s")
+    history_start = now - np.timedelta64(CUSTOMER_HISTORY_DAYS, "D")
+
+    created_at = _uniform_datetimes(rng, np.full(n, history_start), now)
+    ingestion_date = (created_at + _days(rng.integers(0, 4, n))).astype("datetime64[D]")
+
+    email_base = _pick(rng, pools.user_names, n)
+    email_variant = rng.integers(0, 3, n)
+    email = np.select(
+        [email_variant == 0, email_variant == 1],
+        [
+            np.char.add(email_base, "@gmail.com"),
+            np.char.add(np.char.replace(email_base, ".", ""), "@gmail.com"),
+        ],
+        default=np.char.add(email_base, "+promo@gmail.com"),
+    )
+
+    full_name = np.char.add(
+        np.char.add(_pick(rng, pools.first_names, n), " "),
+        _pick(rng, pools.last_names, n),
+    )
+
+    phone = np.char.add(
+        "+1-",
+        np.char.add(
+            np.char.add(rng.integers(201, 990, n).astype(str), "-"),
+            np.char.add(
+                np.char.add(np.char.zfill(rng.integers(0, 1000, n).astype(str), 3), "-"),
+                np.char.zfill(rng.integers(0, 10000, n).astype(str), 4),
+            ),
+        ),
+    )
+
+    def addresses(count: int) -> np.ndarray:
+        city_line = np.char.add(
+            np.char.add(_pick(rng, pools.cities, count), ", "),
+            np.char.add(
+                np.char.add(_pick(rng, pools.states, count), " "),
+                _pick(rng, pools.postcodes, count),
+            ),
+        )
+        return np.char.add(
+            np.char.add(_pick(rng, pools.street_addresses, count), "\n"),
+            city_line,
+        )
+
+    address = addresses(n)
+    shared_addresses = addresses(max(int(n * 0.2), 1))
+    use_shared_address = rng.random(n) < 0.2
+    address[use_shared_address] = _pick(rng, shared_addresses, int(use_shared_address.sum()))
+
+    device_id = _uuid4_array(rng, n)
+    shared_devices = _uuid4_array(rng, max(int(n * 0.15), 1))
+    use_shared_device = rng.random(n) < 0.15
+    device_id[use_shared_device] = _pick(rng, shared_devices, int(use_shared_device.sum()))
+
+    return pd.DataFrame(
+        {
+            "customer_id": _uuid4_array(rng, n),
+            "full_name": full_name,
+            "email": email,
+            "phone": phone,
+            "address": address,
+            "device_id": device_id,
+            "created_at": created_at,
+            "ingestion_date": ingestion_date,
+        }
+    )
+
+
+def generate_accounts_vectorized(
+    customers: pd.DataFrame,
+    rng: np.random.Generator,
+) -> pd.DataFrame:
+    counts = rng.integers(1, 4, len(customers))
+    owner = np.repeat(np.arange(len(customers)), counts)
+    m = len(owner)
+
+    account_type = ACCOUNT_TYPES[rng.integers(0, 3, m)]
+    status = rng.choice(ACCOUNT_STATUSES, size=m, p=ACCOUNT_STATUS_WEIGHTS)
+
+    created_at = _as_datetimes(customers["created_at"])[owner]
+    opened_at = created_at + _days(rng.integers(0, 31, m))
+    closed_at = np.where(
+        status == "closed",
+        opened_at + _days(rng.integers(30, 601, m)),
+        np.datetime64("NaT"),
+    )
+    ingestion_date = opened_at + _days(rng.integers(0, 3, m))
+
+    return pd.DataFrame(
+        {
+            "account_id": _uuid4_array(rng, m),
+            "customer_id": customers["customer_id"].to_numpy()[owner],
+            "account_type": account_type,
+            "status": status,
+            "opened_at": opened_at.astype("datetime64[D]"),
+            "closed_at": closed_at.astype("datetime64[D]"),
+            "ingestion_date": ingestion_date.astype("datetime64[D]"),
+        }
+    )
+
+
+def generate_transactions_vectorized(
+    accounts: pd.DataFrame,
+    rng: np.random.Generator,
+    pools: FakerPools,
+    as_of: datetime,
+) -> pd.DataFrame:
+    account_type = accounts["account_type"].to_numpy()
+    low = np.select([account_type == "credit", account_type == "checking"], [200, 100], default=20)
+    high = np.select([account_type == "credit", account_type == "checking"], [601, 301], default=81)
+    counts = rng.integers(low, high)
+
+    owner = np.repeat(np.arange(len(accounts)), counts)
+
+    opened_at = _as_datetimes(accounts["opened_at"])[owner]
+    created_at = _uniform_datetimes(rng, opened_at, np.datetime64(as_of, "s"))
+
+    return _build_transactions(accounts, owner, created_at, rng, pools)
+
+
+def _build_transactions(
+    accounts: pd.DataFrame,
+    owner: np.ndarray,
+    created_at: np.ndarray,
+    rng: np.random.Generator,
+    pools: FakerPools,
+) -> pd.DataFrame:
+    t = len(owner)
+
+    status = rng.choice(TRANSACTION_STATUSES, size=t, p=TRANSACTION_STATUS_WEIGHTS)
+    settled_at = np.where(
+        status == "success",
+        created_at + _days(rng.integers(0, 3, t)),
+        np.datetime64("NaT"),
+    )
+    ingestion_date = (created_at + _days(rng.integers(0, 6, t))).astype("datetime64[D]")
+
+    bucket = rng.integers(0, len(AMOUNT_BUCKETS_LOW), t)
+    amount = np.round(rng.uniform(AMOUNT_BUCKETS_LOW[bucket], AMOUNT_BUCKETS_HIGH[bucket]), 2)
+
+    transaction_id = _uuid4_array(rng, t)
+    merchant_name = _pick(rng, pools.companies, t)
+    card_last_four = rng.integers(1000, 10000, t).astype(str)
+    device_id = _uuid4_array(rng, t)
+
+    # late-arriving duplicates: same transaction, re-ingested 1-7 days later
+    dup_mask = rng.random(t) < 0.02
+    order, copy_pos = _with_duplicates(t, dup_mask)
+    ingestion_date = ingestion_date[order]
+    ingestion_date[copy_pos] = (
+        created_at[dup_mask] + _days(rng.integers(1, 8, int(dup_mask.sum())))
+    ).astype("datetime64[D]")
+
+    owner = owner[order]
+    return pd.DataFrame(
+        {
+            "transaction_id": transaction_id[order],
+            "account_id": accounts["account_id"].to_numpy()[owner],
+            "customer_id": accounts["customer_id"].to_numpy()[owner],
+            "amount": amount[order],
+            "currency": "USD",
+            "merchant_name": merchant_name[order],
+            "status": status[order],
+            "created_at": created_at[order],
+            "settled_at": settled_at[order],
+            "ingestion_date": ingestion_date,
+            "card_last_four": card_last_four[order],
+            "device_id": device_id[order],
+        }
+    )
+
+
+def generate_payments_vectorized(
+    transactions: pd.DataFrame,
+    rng: np.random.Generator,
+) -> pd.DataFrame:
+    txn_status = transactions["status"].to_numpy()
+    t = len(txn_status)
+
+    max_attempts = rng.integers(1, np.where(txn_status == "pending", 4, 3))
+    # each attempt succeeds with p=0.75 until the first success, then retries stop
+    first_success = rng.geometric(0.75, t)
+    counts = np.minimum(max_attempts, first_success)
+
+    owner = np.repeat(np.arange(t), counts)
+    p = len(owner)
+    attempt_number = _group_positions(counts) + 1
+
+    status = np.where(attempt_number == first_success[owner], "success", "failed")
+    attempted_at = _as_datetimes(transactions["created_at"])[owner] + rng.integers(
+        1, 73, p
+    ).astype("timedelta64[h]")
+    ingestion_date = (attempted_at + _days(rng.integers(0, 3, p))).astype("datetime64[D]")
+
+    return pd.DataFrame(
+        {
+            "payment_id": _uuid4_array(rng, p),
+            "transaction_id": transactions["transaction_id"].to_numpy()[owner],
+            "payment_method": PAYMENT_METHODS[rng.integers(0, 2, p)],
+            "status": status,
+            "attempt_number": attempt_number,
+            "attempted_at": attempted_at,
+            "ingestion_date": ingestion_date,
+        }
+    )
+
+
+def generate_subscriptions_vectorized(
+    customers: pd.DataFrame,
+    rng: np.random.Generator,
+) -> pd.DataFrame:
+    subscribers = np.flatnonzero(rng.random(len(customers)) < 0.7)
+    counts = rng.integers(1, 5, len(subscribers))
+    owner = np.repeat(subscribers, counts)
+    s = len(owner)
+
+    first_start = (
+        _as_datetimes(customers["created_at"])[subscribers].astype("datetime64[D]")
+        + _days(rng.integers(0, 31, len(subscribers)))
+    )
+
+    plan_name = SUBSCRIPTION_PLANS[rng.integers(0, 3, s)]
+    status = SUBSCRIPTION_STATUSES[rng.integers(0, 3, s)]
+    ended = status != "active"
+    duration = rng.integers(30, 181, s)
+    overlap = rng.integers(0, 16, s)
+    gap = rng.integers(30, 121, s)
+
+    # the next change starts shortly before the previous end, or 30-120 days
+    # after an open-ended one; offsets are a per-customer running sum of steps
+    step = np.where(ended, duration - overlap, gap)
+    before = np.cumsum(step) - step
+    group_start = np.cumsum(counts) - counts
+    offset = before - np.repeat(before[group_start], counts)
+
+    start_date = np.repeat(first_start, counts) + _days(offset)
+    end_date = np.where(ended, start_date + _days(duration), np.datetime64("NaT"))
+    ingestion_date = start_date + _days(rng.integers(0, 3, s))
+
+    return pd.DataFrame(
+        {
+            "subscription_id": _uuid4_array(rng, s),
+            "customer_id": customers["customer_id"].to_numpy()[owner],
+            "plan_name": plan_name,
+            "status": status,
+            "start_date": start_date,
+            "end_date": end_date.astype("datetime64[D]"),
+            "ingestion_date": ingestion_date,
+        }
+    )
+
+
+def generate_refunds_vectorized(
+    transactions: pd.DataFrame,
+    rng: np.random.Generator,
+) -> pd.DataFrame:
+    successful = np.flatnonzero(transactions["status"].to_numpy() == "success")
+    picked = rng.choice(successful, size=round(len(successful) * 0.1), replace=False)
+    r = len(picked)
+
+    refunded_at = _as_datetimes(transactions["created_at"])[picked] + _days(rng.integers(2, 15, r))
+
+    amount = transactions["amount"].to_numpy()[picked]
+    partial = rng.random(r) < 0.3
+    amount = np.where(partial, np.round(amount * rng.uniform(0.3, 0.9, r), 2), amount)
+
+    refund_reason = REFUND_REASONS[rng.integers(0, 3, r)]
+    ingestion_date = (refunded_at + _days(rng.integers(0, 4, r))).astype("datetime64[D]")
+    refund_id = _uuid4_array(rng, r)
+
+    # duplicate refund events get a fresh refund_id and a later ingestion date
+    dup_mask = rng.random(r) < 0.1
+    order, copy_pos = _with_duplicates(r, dup_mask)
+    n_dups = int(dup_mask.sum())
+    refund_id = refund_id[order]
+    refund_id[copy_pos] = _uuid4_array(rng, n_dups)
+    ingestion_date = ingestion_date[order]
+    ingestion_date[copy_pos] = (
+        refunded_at[dup_mask] + _days(rng.integers(1, 6, n_dups))
+    ).astype("datetime64[D]")
+
+    return pd.DataFrame(
+        {
+            "refund_id": refund_id,
+            "transaction_id": transactions["transaction_id"].to_numpy()[picked][order],
+            "amount": amount[order],
+            "refund_reason": refund_reason[order],
+            "refunded_at": refunded_at[order].astype("datetime64[D]"),
+            "ingestion_date": ingestion_date,
+        }
+    )
+
+
+def _generate_tables(
+    n_customers: int,
+    rng: np.random.Generator,
+    pools: FakerPools,
+    as_of: datetime,
+) -> Dict[str, pd.DataFrame]:
+    customers = generate_customers_vectorized(n_customers, rng, pools, as_of)
+    accounts = generate_accounts_vectorized(customers, rng)
+    transactions = generate_transactions_vectorized(accounts, rng, pools, as_of)
+    payments = generate_payments_vectorized(transactions, rng)
+    subscriptions = generate_subscriptions_vectorized(customers, rng)
+    refunds = generate_refunds_vectorized(transactions, rng)
+
+    return {
+        "customers": customers,
+        "accounts": accounts,
+        "transactions": transactions,
+        "payments": payments,
+        "subscriptions": subscriptions,
+        "refunds": refunds,
+    }
+
+
+def generate_all_vectorized(
+    n_customers: int,
+    seed: int = SEED,
+    as_of: Optional[datetime] = None,
+    pools: Optional[FakerPools] = None,
+) -> Dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    pools = pools or build_faker_pools(seed)
+    as_of = as_of or datetime.now()
+    return _generate_tables(n_customers, rng, pools, as_of)
+
+
+# ---------------------------------------------------------------------------
+# Writers
+#
+# CSV output is one file per table (data/raw/<table>.csv). Parquet output is a
+# hive-partitioned dataset per table (data/raw/<table>/ingestion_date=.../),
+# which the bronze models read when dbt runs with raw_file_format=parquet.
+# ---------------------------------------------------------------------------
+
+RAW_TABLES = ["customers", "accounts", "transactions", "payments", "subscriptions", "refunds"]
+OUTPUT_FORMATS = {"csv": ("csv",), "parquet": ("parquet",), "both": ("csv", "parquet")}
+
+
+def reset_outputs(out_dir: Path, formats: Tuple[str, ...]) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name in RAW_TABLES:
+        if "csv" in formats:
+            (out_dir / f"{name}.csv").unlink(missing_ok=True)
+        if "parquet" in formats and (out_dir / name).is_dir():
+            shutil.rmtree(out_dir / name)
+
+
+def write_tables(
+    tables: Dict[str, pd.DataFrame],
+    out_dir: Path,
+    formats: Tuple[str, ...],
+    part_name: str = "part-00000",
+) -> None:
+    for name, df in tables.items():
+        if "csv" in formats:
+            path = out_dir / f"{name}.csv"
+            header = not path.exists()
+            df.to_csv(path, mode="w" if header else "a", header=header, index=False)
+
+        if "parquet" in formats:
+            partitioned = df.assign(
+                ingestion_date=pd.to_datetime(df["ingestion_date"]).dt.strftime("%Y-%m-%d")
+            )
+            partitioned.to_parquet(
+                out_dir / name,
+                partition_cols=["ingestion_date"],
+                index=False,
+                basename_template=f"{part_name}-{{i}}.parquet",
+            )
+
+
+@dataclass
+class ShardTask:
+    shard_index: int
+    n_customers: int
+    seed: int
+    as_of: datetime
+    pools: FakerPools
+    out_dir: Path
+    formats: Tuple[str, ...]
+
+
+def shard_rng(seed: int, shard_index: int) -> np.random.Generator:
+    # Child seed of the global seed, keyed by shard position only, so a shard
+    # draws the same rows no matter which worker (or how many) generate it.
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(shard_index,)))
+
+
+def _shard_csv_path(out_dir: Path, name: str, shard_index: int) -> Path:
+    return out_dir / "_shards" / name / f"part-{shard_index:05d}.csv"
+
+
+def generate_shard(task: ShardTask) -> Dict[str, int]:
+    rng = shard_rng(task.seed, task.shard_index)
+    tables = _generate_tables(task.n_customers, rng, task.pools, task.as_of)
+    part_name = f"part-{task.shard_index:05d}"
+
+    if "parquet" in task.formats:
+        write_tables(tables, task.out_dir, ("parquet",), part_name=part_name)
+
+    if "csv" in task.formats:
+        for name, df in tables.items():
+            path = _shard_csv_path(task.out_dir, name, task.shard_index)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            df.to_csv(path, index=False)
+
+    return {name: len(df) for name, df in tables.items()}
+
+
+def _merge_shard_csv(out_dir: Path, shard_index: int) -> None:
+    for name in RAW_TABLES:
+        part = _shard_csv_path(out_dir, name, shard_index)
+        target = out_dir / f"{name}.csv"
+        with part.open("rb") as src, target.open("ab") as dst:
+            if shard_index > 0:
+                src.readline()
+            shutil.copyfileobj(src, dst)
+        part.unlink()
+
+
+def stream_vectorized(
+    n_customers: int,
+    out_dir: Path = RAW_DATA_DIR,
+    shard_size: int = 1000,
+    formats: Tuple[str, ...] = ("csv",),
+    seed: int = SEED,
+    as_of: Optional[datetime] = None,
+    workers: int = 1,
+    on_shard: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Generate customers in fixed-size shards and write every shard to disk as
+    soon as it is drawn, so peak memory follows shard_size rather than
+    n_customers.
+
+    Shards run on a process pool when workers > 1. Each shard gets its own
+    seed derived from (seed, shard_index), and CSV shards are merged into
+    data/raw/<table>.csv in shard order, so the output only depends on seed,
+    as_of and shard_size. A manifest.json records the shards and row counts;
+    on_shard, if given, receives each shard's manifest entry once it is on
+    disk. Returns total rows written per table.
+    """
+    pools = build_faker_pools(seed)
+    as_of = as_of or datetime.now()
+
+    reset_outputs(out_dir, formats)
+    shutil.rmtree(out_dir / "_shards", ignore_errors=True)
+
+    tasks = [
+        ShardTask(
+            shard_index=shard_index,
+            n_customers=min(shard_size, n_customers - shard_start),
+            seed=seed,
+            as_of=as_of,
+            pools=pools,
+            out_dir=out_dir,
+            formats=formats,
+        )
+        for shard_index, shard_start in enumerate(range(0, n_customers, shard_size))
+    ]
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(generate_shard, tasks)
+    else:
+        executor = None
+        results = map(generate_shard, tasks)
+
+    row_counts = dict.fromkeys(RAW_TABLES, 0)
+    shards: List[Dict[str, Any]] = []
+    try:
+        # map() yields in submission order, so CSV merging stays deterministic
+        for task, shard_rows in zip(tasks, results):
+            if "csv" in formats:
+                _merge_shard_csv(out_dir, task.shard_index)
+
+            for name, n in shard_rows.items():
+                row_counts[name] += n
+            shards.append(
+                {"shard": task.shard_index, "customers": task.n_customers, "rows": shard_rows}
+            )
+            if on_shard is not None:
+                on_shard(shards[-1])
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    shutil.rmtree(out_dir / "_shards", ignore_errors=True)
+
+    manifest = {
+        "seed": seed,
+        "as_of": as_of.isoformat(),
+        "n_customers": n_customers,
+        "shard_size": shard_size,
+        "formats": list(formats),
+        "tables": {
+            name: {
+                "csv": f"{name}.csv" if "csv" in formats else None,
+                "parquet": f"{name}/ingestion_date=*/*.parquet" if "parquet" in formats else None,
+                "rows": row_counts[name],
+            }
+            for name in RAW_TABLES
+        },
+        "shards": shards,
+    }
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    return row_counts
+
+
+
+# ---------------------------------------------------------------------------
+# Daily deltas
+#
+# Reads the raw files already on disk and appends only the next N days of
+# activity, so dbt incremental runs can be timed against a full refresh.
+# Every delta row is ingested inside the new window, after the current
+# ingestion_date watermark, which is what incremental_ingestion_filter picks up.
+# ---------------------------------------------------------------------------
+
+DELTA_TABLES = ["customers", "accounts", "transactions", "payments", "refunds"]
+DAILY_TRANSACTION_RATE = {"credit": 400 / 365, "checking": 200 / 365, "savings": 50 / 365}
+
+
+def _raw_relation(out_dir: Path, name: str, formats: Tuple[str, ...]) -> str:
+    if "csv" in formats:
+        return f"read_csv_auto('{(out_dir / f'{name}.csv').as_posix()}')"
+    return f"read_parquet('{(out_dir / name).as_posix()}/*/*.parquet', hive_partitioning = true)"
+
+
+def _clamp_days(values: np.ndarray, low: np.datetime64, high: np.datetime64) -> np.ndarray:
+    return np.minimum(np.maximum(values.astype("datetime64[D]"), low), high)
+
+
+def _in_window(df: pd.DataFrame, low: np.datetime64, high: np.datetime64) -> pd.DataFrame:
+    ingestion_date = df["ingestion_date"].to_numpy().astype("datetime64[D]")
+    return df[(ingestion_date >= low) & (ingestion_date <= high)].reset_index(drop=True)
+
+
+def generate_delta(
+    days: int,
+    out_dir: Path = RAW_DATA_DIR,
+    formats: Tuple[str, ...] = ("csv",),
+    seed: int = SEED,
+) -> Dict[str, int]:
+    """
+    Append the next `days` days of new customers and accounts, transactions
+    on every account, late-arriving duplicates, payments and refunds to the
+    raw files in out_dir. Subscriptions are left alone: the full generator
+    already lays out their lifecycle into the future.
+
+    The window starts the day after the latest transactions ingestion_date
+    and is seeded from (seed, window start), so re-running the same
+    window reproduces it. Returns rows appended per table.
+    """
+    import duckdb
+
+    con = duckdb.connect()
+    rel = {name: _raw_relation(out_dir, name, formats) for name in DELTA_TABLES}
+
+    # The window follows the transactions watermark. Refunds are ingested up
+    # to weeks after their transaction, so the overall maximum would leave a
+    # gap in created_at; each table's rows are instead kept after that
+    # table's own watermark so the incremental filter still picks them up.
+    per_table_max = " union all ".join(
+        f"select '{name}', max(ingestion_date) from {rel[name]}" for name in DELTA_TABLES
+    )
+    watermarks = dict(con.execute(per_table_max).fetchall())
+    last_created = con.execute(f"select max(created_at) from {rel['transactions']}").fetchone()[0]
+    if watermarks["transactions"] is None:
+        raise RuntimeError(f"No raw data found under {out_dir}. Run a full generation first.")
+
+    window_start = np.datetime64(watermarks["transactions"], "D") + np.timedelta64(1, "D")
+    window_last = window_start + np.timedelta64(days - 1, "D")
+    window_end = (window_last + np.timedelta64(1, "D")).astype("datetime64[s]")
+
+    rng = np.random.default_rng([seed, int(window_start.astype(np.int64))])
+    pools = build_faker_pools(seed)
+
+    n_existing_customers = con.execute(f"select count(*) from {rel['customers']}").fetchone()[0]
+    existing_accounts = con.execute(
+        f"""
+        select distinct on (account_id) account_id, customer_id, account_type, opened_at
+        from {rel['accounts']}
+        order by account_id, ingestion_date desc
+        """
+    ).df()
+    recent_transactions = con.execute(
+        f"""
+        select
+          * replace (cast(card_last_four as varchar) as card_last_four),
+          transaction_id in (select transaction_id from {rel['refunds']}) as refunded
+        from {rel['transactions']}
+        where created_at >= cast(? as timestamp) - interval 14 day
+        """,
+        [last_created],
+    ).df()
+    con.close()
+
+    # new customers and their accounts, created inside the window
+    n_new = int(rng.poisson(n_existing_customers / CUSTOMER_HISTORY_DAYS * days))
+    # numpy's string functions reject empty arrays, so a quiet window draws
+    # one customer and drops it instead of special-casing the generator
+    customers = generate_customers_vectorized(max(n_new, 1), rng, pools, window_start.astype(datetime))
+    customers = customers.iloc[:n_new].copy()
+    customers["created_at"] = _uniform_datetimes(rng, np.full(n_new, window_start), window_end)
+    customers["ingestion_date"] = _clamp_days(
+        customers["created_at"].to_numpy() + _days(rng.integers(0, 4, n_new)), window_start, window_last
+    )
+
+    accounts = generate_accounts_vectorized(customers, rng)
+    accounts["opened_at"] = np.minimum(accounts["opened_at"].to_numpy(), window_last)
+    accounts["ingestion_date"] = _clamp_days(accounts["ingestion_date"].to_numpy(), window_start, window_last)
+
+    # Transactions on existing and new accounts. Events are drawn from five
+    # days before the window (the longest ingestion lag) and only rows that
+    # are ingested inside the window are kept, so earlier events show up as
+    # late arrivals and each window day gets a steady volume. Events after
+    # the last created_at on disk were never written, so when the window
+    # starts later than that (the first delta after a full run) they are
+    # drawn from there and arrive late on the window's first day.
+    last_created = np.datetime64(last_created, "s")
+    events_from = min((window_start - np.timedelta64(5, "D")).astype("datetime64[s]"), last_created)
+    active = pd.concat([existing_accounts, accounts[existing_accounts.columns]], ignore_index=True)
+    account_type = active["account_type"].to_numpy()
+    rate = np.select(
+        [account_type == "credit", account_type == "checking"],
+        [DAILY_TRANSACTION_RATE["credit"], DAILY_TRANSACTION_RATE["checking"]],
+        default=DAILY_TRANSACTION_RATE["savings"],
+    )
+    counts = rng.poisson(rate * (window_end - events_from) / np.timedelta64(1, "D"))
+    owner = np.repeat(np.arange(len(active)), counts)
+    earliest = np.maximum(_as_datetimes(active["opened_at"])[owner], events_from)
+    created_at = _uniform_datetimes(rng, earliest, window_end)
+    drawn = _build_transactions(active, owner, created_at, rng, pools)
+    unwritten = _as_datetimes(drawn["created_at"]) > last_created
+    drawn.loc[unwritten, "ingestion_date"] = np.maximum(
+        drawn["ingestion_date"].to_numpy().astype("datetime64[D]"), window_start
+    )[unwritten]
+
+    # late-arriving duplicates of transactions from the previous days
+    recent = recent_transactions[drawn.columns]
+    late = recent[rng.random(len(recent)) < 0.02].copy()
+    late["ingestion_date"] = _as_datetimes(late["created_at"]).astype("datetime64[D]") + _days(
+        rng.integers(1, 8, len(late))
+    )
+    drawn = _in_window(drawn, window_start, window_last)
+    transactions = pd.concat([drawn, _in_window(late, window_start, window_last)], ignore_index=True)
+
+    # Every payment of a drawn transaction is written with this delta, so the
+    # payments per transaction match a full run. Attempts that would land
+    # after the window are ingested on its last day instead (and attempted
+    # by then). Late duplicates of recent transactions already have their
+    # payments on disk and get none.
+    payments = generate_payments_vectorized(drawn, rng)
+    payments["ingestion_date"] = _clamp_days(payments["ingestion_date"].to_numpy(), window_start, window_last)
+    payments["attempted_at"] = np.minimum(
+        payments["attempted_at"].to_numpy(), window_end - np.timedelta64(1, "s")
+    )
+
+    # refunds of recent and new transactions that are ingested in the window;
+    # only transactions already on disk or appended here can be refunded,
+    # and only once
+    not_refunded = recent[~recent_transactions["refunded"].to_numpy()]
+    refundable = pd.concat([not_refunded, drawn], ignore_index=True).drop_duplicates("transaction_id")
+    refunds = _in_window(generate_refunds_vectorized(refundable, rng), window_start, window_last)
+
+    tables = {
+        "customers": customers,
+        "accounts": accounts,
+        "transactions": transactions,
+        "payments": payments,
+        "refunds": refunds,
+    }
+    for name, df in tables.items():
+        if watermarks[name] is not None:
+            floor = np.datetime64(watermarks[name], "D") + np.timedelta64(1, "D")
+            df["ingestion_date"] = np.maximum(df["ingestion_date"].to_numpy().astype("datetime64[D]"), floor)
+    write_tables(tables, out_dir, formats, part_name=f"delta-{window_start.astype(datetime):%Y%m%d}")
+
+    print(f"delta window {window_start} to {window_last}")
+    return {name: len(df) for name, df in tables.items()}
+
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate synthetic raw finance data.")
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument(
+        "--engine",
+        choices=["faker", "vectorized"],
+        default="faker",
+        help="faker builds rows one at a time; vectorized draws whole columns with NumPy",
+    )
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument(
+        "--as-of",
+        type=datetime.fromisoformat,
+        default=None,
+        help="fixed 'now' for the vectorized engine, for byte-identical reruns",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="vectorized engine only: generate and append customers shard by shard",
+    )
+    parser.add_argument("--shard-size", type=int, default=1000, help="customers per streamed shard")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="processes generating streamed shards; output does not depend on this",
+    )
+    parser.add_argument(
+        "--delta-days",
+        type=int,
+        default=None,
+        help="append the next N days of activity to the existing raw files instead of regenerating",
+    )
+    parser.add_argument("--format", choices=sorted(OUTPUT_FORMATS), default="csv")
+    parser.add_argument("--out-dir", type=Path, default=RAW_DATA_DIR)
+    args = parser.parse_args()
+
+    if args.stream and args.engine != "vectorized":
+        parser.error("--stream requires --engine vectorized")
+    if args.delta_days is not None and args.delta_days < 1:
+        parser.error("--delta-days must be at least 1")
+    return args
 
 
+def main():
+    args = parse_args()
+    formats = OUTPUT_FORMATS[args.format]
+
+    if args.delta_days is not None:
+        row_counts = generate_delta(args.delta_days, out_dir=args.out_dir, formats=formats, seed=args.seed)
+        print("rows appended", row_counts)
+        return
+
+    if args.stream:
+        row_counts = stream_vectorized(
+            args.customers,
+            out_dir=args.out_dir,
+            shard_size=args.shard_size,
+            formats=formats,
+            seed=args.seed,
+            as_of=args.as_of,
+            workers=args.workers,
+            on_shard=lambda shard: print(
+                f"shard {shard['shard']} customers {shard['customers']} transactions {shard['rows']['transactions']}"
+            ),
+        )
+        print("rows written", row_counts)
+        return
+
+    if args.engine == "vectorized":
+        tables = generate_all_vectorized(args.customers, seed=args.seed, as_of=args.as_of)
+    else:
+        customers = generate_customers(n_customers=args.customers)
+        accounts = generate_accounts(customers)
+        transactions = generate_transactions(accounts)
+        tables = {
+            "customers": customers,
+            "accounts": accounts,
+            "transactions": transactions,
+            "payments": generate_payments(transactions),
+            "subscriptions": generate_subscriptions(customers),
+            "refunds": generate_refunds(transactions),
+        }
+
+    reset_outputs(args.out_dir, formats)
+    write_tables(tables, args.out_dir, formats)
 
 
+if __name__ == "__main__":
+    main()
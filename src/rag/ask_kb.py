@@ -1,25 +1,41 @@
 from __future__ import annotations
 
+import argparse
+import atexit
 import json
 import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Set
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Set
 
 import numpy as np
 
-try:
-    import faiss  # type: ignore
-except Exception as e:
-    raise RuntimeError("faiss import failed. Install faiss-cpu.") from e
+from src.rag.chunk_store import MANIFEST_NAME, ChunkStore
+from src.rag.deps import import_faiss, import_sentence_transformers
+from src.rag.latency import LatencyRecorder
+from src.rag.lexical import Bm25Index
+from src.rag.query_cache import QueryCache
+from src.rag.rerank import CrossEncoderReranker
 
-try:
-    from sentence_transformers import SentenceTransformer  # type: ignore
-except Exception as e:
-    raise RuntimeError("sentence-transformers import failed. Install sentence-transformers.") from e
 
 
 INDEX_PATH = Path("artifacts/faiss/index.faiss")
 CHUNKS_PATH = Path("artifacts/faiss/chunks.jsonl")
+BUILD_META_PATH = Path("artifacts/faiss/build_meta.json")
+CHUNK_STORE_DIR = Path("artifacts/faiss/chunk_store")
+EMBEDDINGS_PATH = Path("artifacts/faiss/embeddings.npy")
+BM25_DIR = Path("artifacts/faiss/bm25")
+
+# weight of the max-normalized BM25 score added to the cosine score
+LEXICAL_WEIGHT = 0.25
+
+# filters selecting at most this many chunks are searched exactly
+EXACT_FILTER_MAX = 20_000
+
+# set KB_QUERY_CACHE to a file to keep the query cache across restarts
+QUERY_CACHE_PATH = Path(os.environ["KB_QUERY_CACHE"]) if os.environ.get("KB_QUERY_CACHE") else None
 
 
 def load_chunks(path: Path) -> List[Dict[str, Any]]:
@@ -31,7 +47,7 @@ def load_chunks(path: Path) -> List[Dict[str, Any]]:
 
 
 def embed_query(model_name: str, query: str) -> np.ndarray:
-    model = SentenceTransformer(model_name)
+    model = import_sentence_transformers().SentenceTransformer(model_name)
     vec = model.encode([query], normalize_embeddings=True)
     return np.array(vec, dtype=np.float32)
 
@@ -45,68 +61,32 @@ def format_citation(ch: Dict[str, Any]) -> str:
 
 
 
-def retrieve(
+def rank_candidates(
     query: str,
+    scores: List[float],
+    ids: List[int],
+    chunks: List[Dict[str, Any]],
     top_k: int = 8,
     min_score: float = 0.30,
     dedupe_by_source: bool = True,
 ) -> List[Tuple[float, Dict[str, Any]]]:
-    if not INDEX_PATH.exists() or not CHUNKS_PATH.exists():
-        raise RuntimeError("Index not found. Run src/rag/build_kb.py first.")
-
-    index = faiss.read_index(str(INDEX_PATH))
-    chunks = load_chunks(CHUNKS_PATH)
-
-    model_name = os.environ.get("EMBED_MODEL", "all-MiniLM-L6-v2")
-    q = embed_query(model_name, query)
-
-    search_k = max(top_k * 6, 30)
-    scores, ids = index.search(q, search_k)
-
     q_lower = query.lower()
-    churn_mode = "churn" in q_lower
 
     candidates: List[Tuple[float, Dict[str, Any]]] = []
 
-    for score, idx in zip(scores[0].tolist(), ids[0].tolist()):
+    for score, idx in zip(scores, ids):
         if idx < 0 or idx >= len(chunks):
             continue
 
         score_f = float(score)
         ch = chunks[idx]
-        text_lower = ch.get("text", "").lower()
-        source = str(ch.get("source_file", ""))
-
-        # Hybrid keyword gate for churn queries
-        if churn_mode:
-            if (
-                "churn" not in text_lower
-                and "subscription_status" not in text_lower
-                and "canceled" not in text_lower
-                and "cancelled" not in text_lower
-            ):
-                continue
 
         # Penalize intro/purpose chunks for "how is X calculated" questions
         if "how is" in q_lower and "calculated" in q_lower:
+            text_lower = ch.get("text", "").lower()
             if any(k in text_lower for k in ["## purpose", "this document", "these queries are not exploratory"]):
                 score_f -= 0.12
 
-        # Source priority bonus for churn queries
-        if churn_mode:
-            if source.endswith("example_sql.md"):
-                score_f += 0.10
-            elif source.endswith("metric_definitions.md"):
-                score_f += 0.06
-            elif source.endswith("dbt_model_docs.md"):
-                score_f += 0.04
-
-            # Boost chunks that look like actual computation, not prose
-            if "```sql" in text_lower or "select" in text_lower:
-                score_f += 0.10
-            if "## churn" in text_lower or "churn calculation" in text_lower:
-                score_f += 0.10
-
         if score_f < min_score:
             continue
 
@@ -131,6 +111,554 @@ def retrieve(
     return results
 
 
+def search_parameters(
+    index_params: Dict[str, Any],
+    search_k: int,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+) -> Any:
+    """
+    Per-query FAISS search parameters for ANN indexes, defaulting to the
+    values persisted by build_kb. Returns None for the exact flat index.
+    """
+    index_type = index_params.get("index_type", "flat")
+    if index_type not in ("ivf_flat", "ivf_pq", "hnsw"):
+        return None
+
+    faiss = import_faiss()
+    if index_type in ("ivf_flat", "ivf_pq"):
+        return faiss.SearchParametersIVF(nprobe=int(nprobe or index_params.get("nprobe", 8)))
+    if index_type == "hnsw":
+        ef = int(ef_search or index_params.get("ef_search", 64))
+        return faiss.SearchParametersHNSW(efSearch=max(ef, search_k))
+    return None
+
+
+def mmap_io_flag(index_type: Optional[str]) -> int:
+    """
+    read_index flag that memory-maps the index instead of copying it to RAM.
+    IO_FLAG_MMAP only maps IVF inverted lists; IO_FLAG_MMAP_IFC maps the
+    codes of flat, scalar quantized, PQ and HNSW indexes but cannot be
+    combined with it on IVF files.
+    """
+    faiss = import_faiss()
+    if index_type in ("ivf_flat", "ivf_pq") or not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        return faiss.IO_FLAG_MMAP
+    return faiss.IO_FLAG_MMAP_IFC
+
+
+def _supports_selector(index: Any) -> bool:
+    # IndexPQ rejects search-time ID selectors
+    return not isinstance(index, import_faiss().IndexPQ)
+
+
+def exact_scores(q_vec: np.ndarray, ids: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """
+    Float32 inner products for the candidates a quantized index returned.
+    Only these rows of the memory-mapped embeddings are read.
+    """
+    valid = ids >= 0
+    scores = np.full(len(ids), -np.inf, dtype=np.float32)
+    scores[valid] = np.asarray(vectors[ids[valid]]) @ q_vec
+    return scores
+
+
+def exact_top_k(q: np.ndarray, ids: np.ndarray, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact search restricted to ids, shaped like index.search output and
+    padded with -1 when fewer than k ids are given.
+    """
+    scores = np.full((len(q), k), -np.inf, dtype=np.float32)
+    found = np.full((len(q), k), -1, dtype=np.int64)
+    if len(ids) == 0:
+        return scores, found
+
+    sims = q @ np.asarray(vectors[ids]).T
+    n = min(k, len(ids))
+    top = np.argpartition(-sims, n - 1, axis=1)[:, :n]
+    top_sims = np.take_along_axis(sims, top, axis=1)
+    order = np.argsort(-top_sims, axis=1, kind="stable")
+    scores[:, :n] = np.take_along_axis(top_sims, order, axis=1)
+    found[:, :n] = ids[np.take_along_axis(top, order, axis=1)]
+    return scores, found
+
+
+@dataclass(frozen=True)
+class SearchSettings:
+    """Everything besides the question that shapes a result; part of the result cache key."""
+    top_k: int = 8
+    min_score: float = 0.30
+    dedupe_by_source: bool = True
+    nprobe: Optional[int] = None
+    ef_search: Optional[int] = None
+    lexical_weight: float = LEXICAL_WEIGHT
+    source_files: Tuple[str, ...] = ()
+    sections: Tuple[str, ...] = ()
+    rerank: bool = False
+
+
+@dataclass
+class LoadedBuild:
+    index: Any
+    chunks: ChunkStore
+    index_params: Dict[str, Any]
+    bm25: Optional[Bm25Index] = None
+    vectors: Optional[np.ndarray] = None
+
+
+def fuse_lexical(
+    query: str,
+    q_vec: np.ndarray,
+    scores: List[float],
+    ids: List[int],
+    build: LoadedBuild,
+    search_k: int,
+    lexical_weight: float = LEXICAL_WEIGHT,
+    allowed: Optional[np.ndarray] = None,
+) -> Tuple[List[float], List[int]]:
+    """
+    Hybrid scores: cosine + lexical_weight * BM25 / best BM25 for the query.
+
+    BM25 hits that FAISS did not return join the candidates with their cosine
+    score computed from the stored embeddings, so an exact term match is not
+    lost to the dense cutoff. allowed restricts BM25 to the same filter as
+    the dense search.
+    """
+    fused = {idx: float(score) for score, idx in zip(scores, ids) if idx >= 0}
+    if build.bm25 is None or lexical_weight <= 0:
+        return list(fused.values()), list(fused.keys())
+
+    lex_ids, lex_scores = build.bm25.search(query, search_k, allowed)
+    if len(lex_ids) == 0:
+        return list(fused.values()), list(fused.keys())
+
+    missing = [i for i in lex_ids.tolist() if i not in fused]
+    if missing and build.vectors is not None:
+        dense = np.asarray(build.vectors[missing]) @ q_vec
+        fused.update(zip(missing, dense.tolist()))
+
+    for idx, lex in zip(lex_ids.tolist(), (lex_scores / lex_scores[0]).tolist()):
+        if idx in fused:
+            fused[idx] += lexical_weight * lex
+
+    return list(fused.values()), list(fused.keys())
+
+
+class Retriever:
+    """
+    Long-lived retriever.
+
+    Loads the embedding model once, on first use, and the FAISS index, the memory-mapped
+    chunk store and the BM25 postings once per build. Before each query it
+    stats the artifact files and swaps in the new build when they changed,
+    so a running service picks up build_kb.py output without a restart.
+
+    Query embeddings and ranked results are kept in a QueryCache, which is
+    cleared whenever a new build is swapped in.
+
+    retrieve(rerank=True) passes the best candidates through a
+    CrossEncoderReranker, loaded on first use unless one is given. Stage
+    latencies are kept in self.latency.
+    """
+
+    def __init__(
+        self,
+        index_path: Path = INDEX_PATH,
+        store_dir: Path = CHUNK_STORE_DIR,
+        model_name: Optional[str] = None,
+        cache: Optional[QueryCache] = None,
+        reranker: Optional[CrossEncoderReranker] = None,
+    ) -> None:
+        self.index_path = index_path
+        self.store_dir = store_dir
+        self.meta_path = index_path.parent / BUILD_META_PATH.name
+        self.embeddings_path = index_path.parent / EMBEDDINGS_PATH.name
+        self.bm25_dir = index_path.parent / BM25_DIR.name
+        self.model_name = model_name or os.environ.get("EMBED_MODEL", "all-MiniLM-L6-v2")
+        self._model: Any = None
+        self.cache = cache if cache is not None else QueryCache(path=QUERY_CACHE_PATH)
+        self.reranker = reranker
+        self.latency = LatencyRecorder()
+
+        self._lock = threading.Lock()
+        self._build: Optional[LoadedBuild] = None
+        self._checked_stamp: Optional[Tuple[int, int]] = None
+        self.maybe_reload()
+
+    def _artifact_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            return (
+                self.index_path.stat().st_mtime_ns,
+                (self.store_dir / MANIFEST_NAME).stat().st_mtime_ns,
+            )
+        except FileNotFoundError:
+            return None
+
+    def maybe_reload(self) -> bool:
+        stamp = self._artifact_stamp()
+        if stamp is None:
+            if self._build is None:
+                raise RuntimeError("Index not found. Run python -m src.rag.build_kb first.")
+            return False
+        if stamp == self._checked_stamp:
+            return False
+
+        with self._lock:
+            if stamp == self._checked_stamp:
+                return False
+
+            meta: Dict[str, Any] = {}
+            if self.meta_path.exists():
+                meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+            index_params = meta.get("index", {})
+
+            # memory-mapped, so replicas share the OS page cache instead of
+            # each holding a private copy of the vectors
+            faiss = import_faiss()
+            index = faiss.read_index(str(self.index_path), mmap_io_flag(index_params.get("index_type")))
+            chunks = ChunkStore(self.store_dir)
+
+            # build_kb swaps the index in before the chunk store; keep
+            # serving the previous build until both describe the same chunks.
+            # The stamp is recorded either way, so a mismatch is read once
+            # and checked again only when one of the files changes.
+            if index.ntotal != len(chunks):
+                if self._build is None:
+                    raise RuntimeError("Index and chunk metadata are out of sync. Rebuild the knowledge base.")
+                self._checked_stamp = stamp
+                return False
+
+            # builds from before the lexical index just run dense only
+            bm25: Optional[Bm25Index] = None
+            if (self.bm25_dir / "stats.json").exists():
+                bm25 = Bm25Index(self.bm25_dir)
+                if len(bm25) != len(chunks):
+                    bm25 = None
+
+            vectors: Optional[np.ndarray] = None
+            if self.embeddings_path.exists():
+                vectors = np.load(self.embeddings_path, mmap_mode="r")
+                if len(vectors) != len(chunks):
+                    vectors = None
+
+            self._build = LoadedBuild(
+                index=index,
+                chunks=chunks,
+                index_params=index_params,
+                bm25=bm25,
+                vectors=vectors,
+            )
+            self._checked_stamp = stamp
+            self.cache.set_version(meta.get("build_id") or f"{stamp[0]}-{stamp[1]}")
+            return True
+
+    @property
+    def model(self) -> Any:
+        # loaded on the first cache miss, so cached questions never import torch
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = import_sentence_transformers().SentenceTransformer(self.model_name)
+        return self._model
+
+    def get_reranker(self) -> CrossEncoderReranker:
+        if self.reranker is None:
+            with self._lock:
+                if self.reranker is None:
+                    self.reranker = CrossEncoderReranker()
+        return self.reranker
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self._build.chunks) if self._build else 0
+
+    def embed(self, query: str) -> np.ndarray:
+        cached = self.cache.get_embedding(query)
+        if cached is not None:
+            return cached[None, :]
+        vec = np.array(self.model.encode([query], normalize_embeddings=True), dtype=np.float32)
+        self.cache.put_embedding(query, vec[0])
+        return vec
+
+    def embed_batch(self, queries: List[str], batch_size: int = 64) -> np.ndarray:
+        """Encode only the queries whose embedding is not cached, in one batch."""
+        vecs: List[Optional[np.ndarray]] = [self.cache.get_embedding(q) for q in queries]
+        missing = [i for i, v in enumerate(vecs) if v is None]
+        if missing:
+            fresh = np.array(
+                self.model.encode([queries[i] for i in missing], batch_size=batch_size, normalize_embeddings=True),
+                dtype=np.float32,
+            )
+            for i, vec in zip(missing, fresh):
+                self.cache.put_embedding(queries[i], vec)
+                vecs[i] = vec
+        return np.stack(vecs).astype(np.float32)
+
+    def _search(
+        self,
+        build: LoadedBuild,
+        q: np.ndarray,
+        search_k: int,
+        settings: SearchSettings,
+        allowed: Optional[np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        params = search_parameters(build.index_params, search_k, settings.nprobe, settings.ef_search)
+        if allowed is None:
+            return build.index.search(q, search_k, params=params)
+
+        ids = np.flatnonzero(allowed)
+        # small selections (one doc family) are cheaper to scan exactly
+        # than to filter inside the index, and always fill top_k
+        if build.vectors is not None and (len(ids) <= EXACT_FILTER_MAX or not _supports_selector(build.index)):
+            return exact_top_k(q, ids, build.vectors, search_k)
+
+        faiss = import_faiss()
+        bitmap = np.packbits(allowed, bitorder="little")
+        params = params or faiss.SearchParameters()
+        params.sel = faiss.IDSelectorBitmap(len(allowed), faiss.swig_ptr(bitmap))
+        scores, found = build.index.search(q, search_k, params=params)
+
+        # IVF probes and HNSW walks can run dry under a strict filter
+        short = (found >= 0).sum(axis=1) < min(search_k, len(ids))
+        if short.any() and build.vectors is not None:
+            scores[short], found[short] = exact_top_k(q[short], ids, build.vectors, search_k)
+        return scores, found
+
+    def _rank(
+        self,
+        build: LoadedBuild,
+        query: str,
+        q_vec: np.ndarray,
+        scores: np.ndarray,
+        ids: np.ndarray,
+        search_k: int,
+        settings: SearchSettings,
+        allowed: Optional[np.ndarray],
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        with self.latency.time("fuse"):
+            if build.index_params.get("rerank") and build.vectors is not None:
+                scores = exact_scores(q_vec, ids, build.vectors)
+            fused_scores, fused_ids = fuse_lexical(
+                query, q_vec, scores.tolist(), ids.tolist(), build, search_k, settings.lexical_weight, allowed
+            )
+
+        reranker = self.get_reranker() if settings.rerank else None
+        with self.latency.time("rank"):
+            results = rank_candidates(
+                query,
+                fused_scores,
+                fused_ids,
+                build.chunks,
+                top_k=max(settings.top_k, reranker.top_n) if reranker else settings.top_k,
+                min_score=settings.min_score,
+                dedupe_by_source=settings.dedupe_by_source,
+            )
+
+        cacheable = self._build is build
+        if reranker is not None:
+            with self.latency.time("rerank"):
+                reranked = reranker.rerank(query, results)
+            if reranked is None:
+                # over budget: serve the bi-encoder order, but do not cache
+                # it under settings that asked for a re-rank
+                cacheable = False
+            else:
+                results = reranked
+            results = results[: settings.top_k]
+
+        # do not cache against a build that was swapped out mid query
+        if cacheable:
+            self.cache.put_results(query, settings, results)
+        return results
+
+    def _allowed(self, build: LoadedBuild, settings: SearchSettings) -> Optional[np.ndarray]:
+        if not settings.source_files and not settings.sections:
+            return None
+        return build.chunks.filter_mask(settings.source_files, settings.sections)
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 8,
+        min_score: float = 0.30,
+        dedupe_by_source: bool = True,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        lexical_weight: float = LEXICAL_WEIGHT,
+        source_files: Optional[Sequence[str]] = None,
+        sections: Optional[Sequence[str]] = None,
+        rerank: bool = False,
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        started = time.perf_counter()
+        self.maybe_reload()
+        build = self._build
+
+        settings = SearchSettings(
+            top_k=top_k,
+            min_score=min_score,
+            dedupe_by_source=dedupe_by_source,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            lexical_weight=lexical_weight,
+            source_files=tuple(source_files or ()),
+            sections=tuple(sections or ()),
+            rerank=rerank,
+        )
+        cached = self.cache.get_results(query, settings)
+        if cached is not None:
+            self.latency.record("total", (time.perf_counter() - started) * 1000)
+            return list(cached)
+
+        with self.latency.time("embed"):
+            q = self.embed(query)
+
+        search_k = max(top_k * 6, 30)
+        with self.latency.time("search"):
+            allowed = self._allowed(build, settings)
+            scores, ids = self._search(build, q, search_k, settings, allowed)
+
+        results = self._rank(build, query, q[0], scores[0], ids[0], search_k, settings, allowed)
+        self.latency.record("total", (time.perf_counter() - started) * 1000)
+        return results
+
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: int = 8,
+        min_score: float = 0.30,
+        dedupe_by_source: bool = True,
+        batch_size: int = 64,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        lexical_weight: float = LEXICAL_WEIGHT,
+        source_files: Optional[Sequence[str]] = None,
+        sections: Optional[Sequence[str]] = None,
+        rerank: bool = False,
+    ) -> List[List[Tuple[float, Dict[str, Any]]]]:
+        """
+        Same results as calling retrieve() per query, with one batched
+        encode and one matrix search over the queries not already cached.
+        The batched stages are recorded as embed_batch and search_batch.
+        """
+        if not queries:
+            return []
+
+        self.maybe_reload()
+        build = self._build
+
+        settings = SearchSettings(
+            top_k=top_k,
+            min_score=min_score,
+            dedupe_by_source=dedupe_by_source,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            lexical_weight=lexical_weight,
+            source_files=tuple(source_files or ()),
+            sections=tuple(sections or ()),
+            rerank=rerank,
+        )
+        results: List[Optional[List[Tuple[float, Dict[str, Any]]]]] = []
+        for query in queries:
+            cached = self.cache.get_results(query, settings)
+            results.append(list(cached) if cached is not None else None)
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            with self.latency.time("embed_batch"):
+                q = self.embed_batch([queries[i] for i in missing], batch_size=batch_size)
+
+            search_k = max(top_k * 6, 30)
+            with self.latency.time("search_batch"):
+                allowed = self._allowed(build, settings)
+                scores, ids = self._search(build, q, search_k, settings, allowed)
+
+            for row, i in enumerate(missing):
+                results[i] = self._rank(
+                    build, queries[i], q[row], scores[row], ids[row], search_k, settings, allowed
+                )
+
+        return results  # type: ignore[return-value]
+
+
+_default_retriever: Optional[Retriever] = None
+
+
+def get_retriever() -> Retriever:
+    global _default_retriever
+    if _default_retriever is None:
+        _default_retriever = Retriever()
+        atexit.register(_default_retriever.cache.save)
+    return _default_retriever
+
+
+def retrieve(
+    query: str,
+    top_k: int = 8,
+    min_score: float = 0.30,
+    dedupe_by_source: bool = True,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    lexical_weight: float = LEXICAL_WEIGHT,
+    source_files: Optional[Sequence[str]] = None,
+    sections: Optional[Sequence[str]] = None,
+    rerank: bool = False,
+) -> List[Tuple[float, Dict[str, Any]]]:
+    """
+    nprobe (IVF) and ef_search (HNSW) trade recall for latency on ANN
+    indexes and default to the values stored by build_kb.
+    lexical_weight scales the BM25 part of the hybrid score; 0 is dense only.
+    source_files (path or file name) and sections restrict the search to
+    matching chunks before ranking.
+    rerank reorders the best candidates with a cross-encoder (RERANK_MODEL)
+    within a latency budget; scores are then cross-encoder scores.
+    """
+    if not INDEX_PATH.exists() or not (CHUNK_STORE_DIR / MANIFEST_NAME).exists():
+        raise RuntimeError("Index not found. Run python -m src.rag.build_kb first.")
+
+    return get_retriever().retrieve(
+        query,
+        top_k=top_k,
+        min_score=min_score,
+        dedupe_by_source=dedupe_by_source,
+        nprobe=nprobe,
+        ef_search=ef_search,
+        lexical_weight=lexical_weight,
+        source_files=source_files,
+        sections=sections,
+        rerank=rerank,
+    )
+
+
+
+def retrieve_batch(
+    queries: List[str],
+    top_k: int = 8,
+    min_score: float = 0.30,
+    dedupe_by_source: bool = True,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    lexical_weight: float = LEXICAL_WEIGHT,
+    source_files: Optional[Sequence[str]] = None,
+    sections: Optional[Sequence[str]] = None,
+    rerank: bool = False,
+) -> List[List[Tuple[float, Dict[str, Any]]]]:
+    if not INDEX_PATH.exists() or not (CHUNK_STORE_DIR / MANIFEST_NAME).exists():
+        raise RuntimeError("Index not found. Run python -m src.rag.build_kb first.")
+
+    return get_retriever().retrieve_batch(
+        queries,
+        top_k=top_k,
+        min_score=min_score,
+        dedupe_by_source=dedupe_by_source,
+        nprobe=nprobe,
+        ef_search=ef_search,
+        lexical_weight=lexical_weight,
+        source_files=source_files,
+        sections=sections,
+        rerank=rerank,
+    )
+
+
 
 
 def build_grounded_answer(question: str, retrieved: List[Tuple[float, Dict[str, Any]]]) -> str:
@@ -160,9 +688,38 @@ def build_grounded_answer(question: str, retrieved: List[Tuple[float, Dict[str,
     return "\n".join(answer_lines)
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ask the knowledge base a question and print the cited chunks.")
+    parser.add_argument("question", nargs="?", default="how is churn calculated")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--min-score", type=float, default=0.25)
+    parser.add_argument(
+        "--index-path",
+        type=Path,
+        default=INDEX_PATH,
+        help="FAISS index; the chunk store, embeddings and BM25 index are read from the same directory",
+    )
+    parser.add_argument("--no-dedupe", action="store_true", help="allow several chunks from the same source file")
+    parser.add_argument("--rerank", action="store_true", help="re-rank candidates with the cross-encoder")
+    return parser.parse_args()
+
+
 def main() -> None:
-    question = "how is churn calculated"
-    retrieved = retrieve(question, top_k=10, min_score=0.25, dedupe_by_source=True)
+    args = parse_args()
+    store_dir = args.index_path.parent / CHUNK_STORE_DIR.name
+    if not args.index_path.exists() or not (store_dir / MANIFEST_NAME).exists():
+        raise RuntimeError("Index not found. Run python -m src.rag.build_kb first.")
+
+    retriever = Retriever(index_path=args.index_path, store_dir=store_dir)
+    question = args.question
+    retrieved = retriever.retrieve(
+        question,
+        top_k=args.top_k,
+        min_score=args.min_score,
+        dedupe_by_source=not args.no_dedupe,
+        rerank=args.rerank,
+    )
+    retriever.cache.save()
 
     print("\nQuestion")
     print(question)
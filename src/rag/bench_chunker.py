@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from src.rag.build_kb import Chunk, chunk_markdown
+
+
+REPORT_PATH = Path("artifacts/reports/chunker_benchmark.json")
+
+WORDS = (
+    "churn revenue refund subscription canceled invoice payment customer account "
+    "metric daily ledger silver gold bronze dbt model status amount currency"
+).split()
+
+
+def legacy_chunk_markdown(
+    text: str,
+    source_file: str,
+    target_chars: int = 900,
+    overlap_chars: int = 120,
+) -> List[Chunk]:
+    """The list-buffer chunker chunk_markdown replaced, kept as the reference for --compare."""
+    lines = text.splitlines()
+    chunks: List[Chunk] = []
+
+    current_section = "root"
+    buffer: List[str] = []
+    buf_start_line = 1
+    current_len = 0
+    chunk_index = 0
+
+    def flush(end_line: int) -> None:
+        nonlocal chunk_index, buffer, current_len, buf_start_line
+        if not buffer:
+            return
+        chunk_text = "\n".join(buffer).strip()
+        if chunk_text:
+            chunks.append(
+                Chunk(
+                    chunk_id=f"{source_file}:{chunk_index}",
+                    text=chunk_text,
+                    source_file=source_file,
+                    section=current_section,
+                    start_line=buf_start_line,
+                    end_line=end_line,
+                )
+            )
+            chunk_index += 1
+
+        buffer = []
+        current_len = 0
+        buf_start_line = end_line + 1
+
+    for i, line in enumerate(lines, start=1):
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            if buffer and current_len >= int(target_chars * 0.6):
+                flush(i - 1)
+            current_section = stripped.lstrip("#").strip() or "root"
+
+        buffer.append(line)
+        current_len += len(line) + 1
+
+        if current_len >= target_chars:
+            flush(i)
+            if overlap_chars > 0 and i < len(lines):
+                overlap: List[str] = []
+                running = 0
+                j = i
+                while j >= 1 and running < overlap_chars:
+                    overlap.insert(0, lines[j - 1])
+                    running += len(lines[j - 1]) + 1
+                    j -= 1
+                if overlap:
+                    buffer = overlap[:]
+                    current_len = sum(len(x) + 1 for x in buffer)
+                    buf_start_line = max(1, i - len(buffer) + 1)
+
+    flush(len(lines))
+
+    chunks = [c for c in chunks if len(c.text) >= 80]
+    return chunks
+
+
+def synthetic_markdown(size_mb: float, seed: int = 42) -> str:
+    """
+    Markdown with headers, prose, tables, lists, blank lines, SQL blocks and
+    the odd very long line, so both the size and the header flush paths are
+    exercised.
+    """
+    rng = random.Random(seed)
+    target = int(size_mb * 1_000_000)
+    parts: List[str] = []
+    size = 0
+    section = 0
+
+    while size < target:
+        roll = rng.random()
+        if roll < 0.04:
+            section += 1
+            line = f"{'#' * rng.randint(1, 3)} Section {section}"
+        elif roll < 0.14:
+            line = ""
+        elif roll < 0.18:
+            line = "```sql\nselect customer_id, sum(amount) from silver_payments group by 1\n```"
+        elif roll < 0.19:
+            line = " ".join(rng.choices(WORDS, k=rng.randint(300, 1500)))
+        elif roll < 0.45:
+            line = rng.choice(["| metric | value |", "|---|---|", "- item", "1. step", "---"])
+        else:
+            line = " ".join(rng.choices(WORDS, k=rng.randint(3, 25)))
+        parts.append(line)
+        size += len(line) + 1
+
+    return "\n".join(parts)
+
+
+def measure(chunker: Callable[..., List[Chunk]], text: str, repeat: int = 3) -> Dict[str, Any]:
+    """Best of repeat timed runs, then one traced run for peak Python memory."""
+    elapsed = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = chunker(text, source_file="bench.md")
+        elapsed = min(elapsed, time.perf_counter() - started)
+
+    tracemalloc.start()
+    chunker(text, source_file="bench.md")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "chunks": len(chunks),
+        "seconds": elapsed,
+        "chunks_per_sec": len(chunks) / elapsed if elapsed else 0.0,
+        "mb_per_sec": len(text) / 1e6 / elapsed if elapsed else 0.0,
+        "peak_mb": peak / 1e6,
+        "_chunks": chunks,
+    }
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(x) for x in value.split(",") if x]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark chunk_markdown on large synthetic markdown.")
+    parser.add_argument("--sizes-mb", type=_float_list, default=[10, 50, 100])
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="also run the legacy chunker and check both give identical chunks",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per size, best is reported")
+    parser.add_argument("--out", type=Path, default=REPORT_PATH)
+    args = parser.parse_args()
+
+    rows: List[Dict[str, Any]] = []
+    for size_mb in args.sizes_mb:
+        text = synthetic_markdown(size_mb)
+        chunkers = {"chunk_markdown": chunk_markdown}
+        if args.compare:
+            chunkers["legacy"] = legacy_chunk_markdown
+
+        results = {name: measure(fn, text, args.repeat) for name, fn in chunkers.items()}
+        identical = None
+        if args.compare:
+            identical = results["chunk_markdown"]["_chunks"] == results["legacy"]["_chunks"]
+            if not identical:
+                raise RuntimeError(f"chunk_markdown and the legacy chunker disagree on {size_mb} MB input")
+
+        for name, r in results.items():
+            r.pop("_chunks")
+            rows.append({"chunker": name, "size_mb": size_mb, **r, "identical": identical})
+            print(
+                f"{name:<15} {size_mb:>6.1f}MB  chunks {r['chunks']:>8}"
+                f"  {r['chunks_per_sec']:>10.0f} chunks/s  {r['mb_per_sec']:>6.2f} MB/s"
+                f"  peak {r['peak_mb']:.1f}MB"
+            )
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps({"results": rows}, indent=2), encoding="utf-8")
+    print("wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.rag.ask_kb import exact_scores, mmap_io_flag, search_parameters
+from src.rag.build_kb import (
+    EMBEDDINGS_PATH,
+    INDEX_TYPES,
+    QUANTIZED_INDEX_TYPES,
+    IndexParams,
+    build_faiss_index,
+    resolve_index_params,
+)
+from src.rag.deps import import_faiss
+
+
+REPORT_PATH = Path("artifacts/reports/index_benchmark.json")
+
+
+def synthetic_corpus(n: int, dim: int, seed: int = 42) -> np.ndarray:
+    """Clustered unit vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 200), dim)).astype(np.float32)
+    vecs = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def sample_queries(corpus: np.ndarray, n: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(corpus), n)
+    q = corpus[rows] + 0.3 * rng.standard_normal((n, corpus.shape[1])).astype(np.float32)
+    return (q / np.linalg.norm(q, axis=1, keepdims=True)).astype(np.float32)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f.tolist()) & set(t.tolist())) for f, t in zip(found, truth))
+    return hits / (k * len(truth))
+
+
+def time_queries(
+    index: Any,
+    queries: np.ndarray,
+    k: int,
+    params: Any,
+    rerank_vectors: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """
+    With rerank_vectors, fetches the retriever's candidate pool and keeps
+    the k best by exact float32 score.
+    """
+    fetch_k = max(k * 6, 30) if rerank_vectors is not None else k
+    latencies: List[float] = []
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    for row in range(len(queries)):
+        started = time.perf_counter()
+        _, found = index.search(queries[row : row + 1], fetch_k, params=params)
+        if rerank_vectors is not None:
+            exact = exact_scores(queries[row], found[0], rerank_vectors)
+            found = found[:, np.argsort(-exact, kind="stable")[:k]]
+        latencies.append((time.perf_counter() - started) * 1000)
+        ids[row] = found[0]
+
+    return {
+        "ids": ids,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "mean_ms": float(np.mean(latencies)),
+    }
+
+
+# runs in a fresh interpreter, so allocator reuse in the benchmark process
+# cannot hide how much memory a read takes
+LOAD_PROBE = """
+import json, os, sys, time
+import faiss
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+before = rss_bytes()
+started = time.perf_counter()
+index = faiss.read_index(sys.argv[1], int(sys.argv[2]))
+ms = (time.perf_counter() - started) * 1000
+after = rss_bytes()
+print(json.dumps({"ms": ms, "rss_mb": None if before is None else (after - before) / 1e6}))
+"""
+
+
+def _probe_load(path: str, flags: int) -> Dict[str, Any]:
+    out = subprocess.run([sys.executable, "-c", LOAD_PROBE, path, str(flags)], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def load_times(index: Any, index_type: str) -> Dict[str, Any]:
+    """
+    Milliseconds and resident memory growth (MB, Linux only) to read the
+    index back from disk, fully and with the retriever's mmap flag.
+    """
+    faiss = import_faiss()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "index.faiss")
+        faiss.write_index(index, path)
+        read = _probe_load(path, 0)
+        mapped = _probe_load(path, mmap_io_flag(index_type))
+
+    return {
+        "load_ms": read["ms"],
+        "load_rss_mb": read["rss_mb"],
+        "mmap_load_ms": mapped["ms"],
+        "mmap_rss_mb": mapped["rss_mb"],
+    }
+
+
+def benchmark(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    index_types: List[str],
+    nprobes: List[int],
+    ef_searches: List[int],
+) -> List[Dict[str, Any]]:
+    flat = build_faiss_index(corpus, IndexParams(index_type="flat"))
+    truth = time_queries(flat, queries, k, None)["ids"]
+
+    rows: List[Dict[str, Any]] = []
+    for index_type in index_types:
+        params = resolve_index_params(IndexParams(index_type=index_type), len(corpus), corpus.shape[1])
+
+        started = time.perf_counter()
+        index = build_faiss_index(corpus, params)
+        build_s = time.perf_counter() - started
+        size_bytes = int(import_faiss().serialize_index(index).nbytes)
+        loaded = load_times(index, index_type)
+
+        if index_type in ("ivf_flat", "ivf_pq"):
+            settings = [{"nprobe": p} for p in nprobes if p <= params.nlist]
+        elif index_type == "hnsw":
+            settings = [{"ef_search": ef} for ef in ef_searches]
+        else:
+            settings = [{}]
+
+        reranks = [False, True] if index_type in QUANTIZED_INDEX_TYPES else [False]
+        for knobs in settings:
+            search_params = search_parameters(asdict(replace(params, **knobs)), k)
+            for rerank in reranks:
+                timed = time_queries(index, queries, k, search_params, corpus if rerank else None)
+                rows.append(
+                    {
+                        "index_type": index_type,
+                        **knobs,
+                        "rerank": rerank,
+                        "nlist": params.nlist if index_type.startswith("ivf") else None,
+                        "recall_at_k": recall_at_k(timed["ids"], truth),
+                        "p50_ms": timed["p50_ms"],
+                        "p95_ms": timed["p95_ms"],
+                        "build_s": build_s,
+                        "size_bytes": size_bytes,
+                        **loaded,
+                    }
+                )
+    return rows
+
+
+def _mb(value: Optional[float]) -> str:
+    return "rss n/a" if value is None else f"rss +{value:.1f}MB"
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(x) for x in value.split(",") if x]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare ANN index types against the exact flat index.")
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=0,
+        help="benchmark N synthetic vectors instead of artifacts/faiss/embeddings.npy",
+    )
+    parser.add_argument("--dim", type=int, default=384, help="dimension of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--index-types", default=",".join(INDEX_TYPES))
+    parser.add_argument("--nprobe", type=_int_list, default=[1, 4, 8, 16, 32])
+    parser.add_argument("--ef-search", type=_int_list, default=[16, 32, 64, 128])
+    parser.add_argument("--out", type=Path, default=REPORT_PATH)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        corpus = synthetic_corpus(args.synthetic, args.dim)
+    elif EMBEDDINGS_PATH.exists():
+        corpus = np.load(EMBEDDINGS_PATH).astype(np.float32)
+    else:
+        raise RuntimeError("No embeddings found. Run python -m src.rag.build_kb first or pass --synthetic N.")
+
+    k = min(args.k, len(corpus))
+    queries = sample_queries(corpus, args.queries)
+    rows = benchmark(
+        corpus,
+        queries,
+        k,
+        [t for t in args.index_types.split(",") if t],
+        args.nprobe,
+        args.ef_search,
+    )
+
+    print(f"vectors {len(corpus)} dim {corpus.shape[1]} queries {len(queries)} k {k}")
+    for r in rows:
+        knob = f"nprobe={r['nprobe']}" if "nprobe" in r else f"ef_search={r['ef_search']}" if "ef_search" in r else ""
+        if r["rerank"]:
+            knob = f"{knob} rerank".strip()
+        print(
+            f"{r['index_type']:<9} {knob:<21} recall@{k} {r['recall_at_k']:.3f}"
+            f"  p50 {r['p50_ms']:.3f}ms  p95 {r['p95_ms']:.3f}ms"
+            f"  build {r['build_s']:.2f}s  size {r['size_bytes'] / 1e6:.1f}MB"
+            f"  load {r['load_ms']:.1f}ms {_mb(r['load_rss_mb'])}"
+            f"  mmap {r['mmap_load_ms']:.1f}ms {_mb(r['mmap_rss_mb'])}"
+        )
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "vectors": len(corpus),
+        "dim": int(corpus.shape[1]),
+        "queries": len(queries),
+        "k": k,
+        "results": rows,
+    }
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print("wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+REPORT_PATH = Path("artifacts/reports/startup_benchmark.json")
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# each probe runs in a fresh interpreter, since imports are cached per process
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from src.rag.ask_kb import format_citation
+print(json.dumps({
+    "import_ms": (time.perf_counter() - started) * 1000,
+    "faiss_loaded": "faiss" in sys.modules,
+    "torch_loaded": "torch" in sys.modules,
+}))
+"""
+
+QUERY_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from src.rag.ask_kb import Retriever
+imported = time.perf_counter()
+retriever = Retriever()
+loaded = time.perf_counter()
+retriever.retrieve(sys.argv[1])
+first = time.perf_counter()
+retriever.retrieve(sys.argv[1] + " please")
+second = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "retriever_init_ms": (loaded - imported) * 1000,
+    "first_query_ms": (first - loaded) * 1000,
+    "warm_query_ms": (second - first) * 1000,
+    "time_to_first_result_ms": (first - started) * 1000,
+}))
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (str(REPO_ROOT), env.get("PYTHONPATH", "")) if p)
+    return env
+
+
+def run_probe(code: str, *argv: str) -> Dict[str, Any]:
+    """Run a probe script in a new interpreter; adds the process wall time."""
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", code, *argv],
+        capture_output=True,
+        text=True,
+        env=_env(),
+        check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def time_command(args: List[str], repeat: int) -> float:
+    """Median wall milliseconds of python <args> over repeat fresh processes."""
+    times: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *args], capture_output=True, env=_env(), check=True)
+        times.append((time.perf_counter() - started) * 1000)
+    return round(float(np.median(times)), 3)
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median of every timing across runs; flags are taken from the first run."""
+    summary: Dict[str, Any] = {}
+    for key, value in runs[0].items():
+        if isinstance(value, bool):
+            summary[key] = value
+        else:
+            summary[key] = round(float(np.median([r[key] for r in runs])), 3)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure import, CLI startup and first-query latency of src.rag.")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes per measurement, median is reported")
+    parser.add_argument("--question", default="how is churn calculated")
+    parser.add_argument(
+        "--skip-query",
+        action="store_true",
+        help="only measure imports and --help, no built index needed",
+    )
+    parser.add_argument("--out", type=Path, default=REPORT_PATH)
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "import_format_citation": summarize([run_probe(IMPORT_PROBE) for _ in range(args.repeat)]),
+        "ask_kb_help_ms": time_command(["-m", "src.rag.ask_kb", "--help"], args.repeat),
+        "build_kb_help_ms": time_command(["-m", "src.rag.build_kb", "--help"], args.repeat),
+    }
+    if not args.skip_query:
+        report["first_query"] = summarize([run_probe(QUERY_PROBE, args.question) for _ in range(args.repeat)])
+
+    print(json.dumps(report, indent=2))
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print("wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,33 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
 import os
-from dataclasses import dataclass
+import shutil
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import Deque, Iterator, List, Dict, Any, Optional, Tuple
 
 import numpy as np
 
-try:
-    import faiss  # type: ignore
-except Exception as e:
-    raise RuntimeError("faiss import failed. Install faiss-cpu.") from e
+from src.rag.chunk_store import ChunkStore, ChunkStoreWriter, swap_in_store
+from src.rag.deps import import_faiss, import_sentence_transformers
+from src.rag.lexical import Bm25Builder
 
-try:
-    from sentence_transformers import SentenceTransformer  # type: ignore
-except Exception as e:
-    raise RuntimeError("sentence-transformers import failed. Install sentence-transformers.") from e
 
 
 KB_DIR = Path("docs/knowledge_base")
 ARTIFACT_DIR = Path("artifacts/faiss")
 INDEX_PATH = ARTIFACT_DIR / "index.faiss"
 CHUNKS_PATH = ARTIFACT_DIR / "chunks.jsonl"
+EMBEDDINGS_PATH = ARTIFACT_DIR / "embeddings.npy"
+BUILD_META_PATH = ARTIFACT_DIR / "build_meta.json"
+CHUNK_STORE_DIR = ARTIFACT_DIR / "chunk_store"
+BM25_DIR = ARTIFACT_DIR / "bm25"
 
 
 @dataclass
@@ -35,12 +40,8 @@ class Chunk:
     end_line: int
 
 
-def read_text_files(root: Path) -> List[Tuple[Path, str]]:
-    files: List[Tuple[Path, str]] = []
-    for p in sorted(root.rglob("*.md")):
-        txt = p.read_text(encoding="utf-8")
-        files.append((p, txt))
-    return files
+def list_markdown_files(root: Path) -> List[Path]:
+    return sorted(root.rglob("*.md"))
 
 
 def chunk_markdown(
@@ -54,139 +55,554 @@ def chunk_markdown(
     * keeps markdown headers as section labels
     * chunks by character length
     * adds overlap to reduce boundary loss
+
+    Chunk boundaries only move at header lines or where the buffer reaches
+    target_chars, so instead of walking every line it jumps between those
+    events. Buffer lengths come from prefix sums of line lengths and both
+    the next size boundary and the overlap start are binary searches.
     """
     lines = text.splitlines()
     chunks: List[Chunk] = []
 
-    current_section = "root"
-    buffer: List[str] = []
-    buf_start_line = 1
-    current_len = 0
+    # offsets[k] is the length of lines[:k], one newline per line included
+    offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, lines), dtype=np.int64, count=len(lines)) + 1, out=offsets[1:])
+    headers = [i for i, line in enumerate(lines) if "#" in line and line.lstrip().startswith("#")]
+    header_flush_chars = int(target_chars * 0.6)
+
+    section_line = -1  # header line naming the current section
+    start = 0  # first line of the buffer
     chunk_index = 0
 
-    def flush(end_line: int) -> None:
-        nonlocal chunk_index, buffer, current_len, buf_start_line
-        if not buffer:
-            return
-        chunk_text = "\n".join(buffer).strip()
+    def flush(end: int) -> None:
+        nonlocal chunk_index
+        chunk_text = "\n".join(lines[start:end]).strip()
         if chunk_text:
+            section = lines[section_line].strip().lstrip("#").strip() if section_line >= 0 else ""
             chunks.append(
                 Chunk(
                     chunk_id=f"{source_file}:{chunk_index}",
                     text=chunk_text,
                     source_file=source_file,
-                    section=current_section,
-                    start_line=buf_start_line,
-                    end_line=end_line,
+                    section=section or "root",
+                    start_line=start + 1,
+                    end_line=end,
                 )
             )
             chunk_index += 1
 
-        buffer = []
-        current_len = 0
-        buf_start_line = end_line + 1
-
-    for i, line in enumerate(lines, start=1):
-        stripped = line.strip()
-        if stripped.startswith("#"):
-            # if header appears and buffer already has content, flush first
-            if buffer and current_len >= int(target_chars * 0.6):
-                flush(i - 1)
-            current_section = stripped.lstrip("#").strip() or "root"
-
-        buffer.append(line)
-        current_len += len(line) + 1
-
-        if current_len >= target_chars:
-            flush(i)
-            # overlap by taking tail of previous content
-            if overlap_chars > 0 and i < len(lines):
-                overlap: List[str] = []
-                running = 0
-                j = i
-                while j >= 1 and running < overlap_chars:
-                    overlap.insert(0, lines[j - 1])
-                    running += len(lines[j - 1]) + 1
-                    j -= 1
-                if overlap:
-                    buffer = overlap[:]
-                    current_len = sum(len(x) + 1 for x in buffer)
-                    buf_start_line = max(1, i - len(buffer) + 1)
-
-    flush(len(lines))
+    def size_boundary(pos: int) -> int:
+        # first line end at or after pos + 1 where the buffer reaches target_chars
+        return max(int(offsets.searchsorted(offsets[start] + target_chars)), pos + 1)
+
+    def flush_full_buffers(until: int) -> None:
+        nonlocal start, size_end
+        while size_end <= until:
+            flush(size_end)
+            start = size_end
+            if overlap_chars > 0 and size_end < len(lines):
+                # overlap by keeping the shortest tail of lines reaching overlap_chars
+                start = max(0, int(offsets.searchsorted(offsets[size_end] - overlap_chars, side="right")) - 1)
+            size_end = size_boundary(size_end)
+
+    size_end = size_boundary(0)
+    for header in headers:
+        flush_full_buffers(header)
+
+        # if header appears and buffer already has content, flush first
+        if header > start and offsets[header] - offsets[start] >= header_flush_chars:
+            flush(header)
+            start = header
+            size_end = size_boundary(header)
+        section_line = header
+
+    flush_full_buffers(len(lines))
+
+    if start < len(lines):
+        flush(len(lines))
 
     # remove tiny chunks
     chunks = [c for c in chunks if len(c.text) >= 80]
     return chunks
 
 
-def build_embeddings(model_name: str, texts: List[str]) -> np.ndarray:
-    model = SentenceTransformer(model_name)
-    embs = model.encode(texts, normalize_embeddings=True, show_progress_bar=True)
-    arr = np.array(embs, dtype=np.float32)
-    return arr
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def save_chunks_jsonl(chunks: List[Chunk], path: Path) -> None:
-    with path.open("w", encoding="utf-8") as f:
-        for c in chunks:
-            rec: Dict[str, Any] = {
-                "chunk_id": c.chunk_id,
-                "text": c.text,
-                "source_file": c.source_file,
-                "section": c.section,
-                "start_line": c.start_line,
-                "end_line": c.end_line,
-            }
-            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
-
-
-def build_faiss_index(embs: np.ndarray) -> Any:
+def load_embedding_cache(model_name: str) -> Dict[str, np.ndarray]:
+    """
+    Embeddings of the previous build keyed by chunk content hash.
+    Empty when there is no previous build or it used another model.
+    """
+    if not (EMBEDDINGS_PATH.exists() and BUILD_META_PATH.exists()):
+        return {}
+
+    meta = json.loads(BUILD_META_PATH.read_text(encoding="utf-8"))
+    if meta.get("embed_model") != model_name:
+        return {}
+
+    # rows stay on disk until a cache hit copies them out
+    vectors = np.load(EMBEDDINGS_PATH, mmap_mode="r")
+    try:
+        hashes = ChunkStore(CHUNK_STORE_DIR).content_hashes()
+    except FileNotFoundError:
+        if not CHUNKS_PATH.exists():
+            return {}
+        with CHUNKS_PATH.open("r", encoding="utf-8") as f:
+            hashes = [json.loads(line).get("content_hash") for line in f]
+    if len(hashes) != len(vectors):
+        return {}
+
+    return {h: vectors[i] for i, h in enumerate(hashes) if h}
+
+
+class BatchEmbedder:
+    """
+    Embeds chunk texts one batch at a time. Texts whose content hash is in
+    the cache reuse the previous vector; the model is only loaded on the
+    first miss, so a build where nothing changed never loads it.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache: Dict[str, np.ndarray],
+        batch_size: int = 128,
+        threads: Optional[int] = None,
+    ) -> None:
+        self.model_name = model_name
+        self.cache = cache
+        self.batch_size = batch_size
+        self.threads = threads
+        self.reused = 0
+        self.recomputed = 0
+        self._model: Any = None
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if self._model is None:
+            if self.threads:
+                import torch  # type: ignore
+
+                torch.set_num_threads(self.threads)
+            self._model = import_sentence_transformers().SentenceTransformer(self.model_name)
+        embs = self._model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True)
+        return np.array(embs, dtype=np.float32)
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        hashes = [content_hash(t) for t in texts]
+
+        missing: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in self.cache:
+                missing.setdefault(h, t)
+
+        fresh: Dict[str, np.ndarray] = {}
+        if missing:
+            fresh = dict(zip(missing.keys(), self._encode(list(missing.values()))))
+
+        arr = np.stack([self.cache[h] if h in self.cache else fresh[h] for h in hashes]).astype(np.float32)
+        recomputed = sum(1 for h in hashes if h not in self.cache)
+        self.recomputed += recomputed
+        self.reused += len(hashes) - recomputed
+        return arr
+
+
+def chunk_record(c: Chunk) -> Dict[str, Any]:
+    return {
+        "chunk_id": c.chunk_id,
+        "text": c.text,
+        "source_file": c.source_file,
+        "section": c.section,
+        "start_line": c.start_line,
+        "end_line": c.end_line,
+        "content_hash": content_hash(c.text),
+    }
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(path.name + ".tmp")
+
+
+class ArtifactWriter:
+    """
+    Streams one build into temp artifacts, batch by batch, and commit()
+    swaps them in with the chunk store last, so readers never see a
+    half-written build.
+
+    Vectors go into the FAISS index as each batch arrives. Indexes that
+    need training keep a reservoir sample of train_size vectors from the
+    whole stream instead, and commit() trains on it and adds the vectors
+    back from the raw embeddings file. Chunk metadata, BM25 postings,
+    chunks.jsonl and the raw embeddings are appended as they come.
+    """
+
+    def __init__(self, params: IndexParams) -> None:
+        self.params = params
+        self.index: Any = None
+        self.dim = 0
+        self.count = 0
+        self._reservoir: Optional[np.ndarray] = None
+        self._rng = np.random.default_rng(params.seed)
+        self._digest = hashlib.sha256()
+
+        for d in [_tmp_path(CHUNK_STORE_DIR), _tmp_path(BM25_DIR)]:
+            shutil.rmtree(d, ignore_errors=True)
+        self._store = ChunkStoreWriter(_tmp_path(CHUNK_STORE_DIR))
+        self._bm25 = Bm25Builder()
+        self._jsonl = _tmp_path(CHUNKS_PATH).open("w", encoding="utf-8")
+        self._raw_path = EMBEDDINGS_PATH.with_name(EMBEDDINGS_PATH.name + ".raw")
+        self._raw = self._raw_path.open("wb")
+
+    def add(self, chunks: List[Chunk], embs: np.ndarray) -> None:
+        records = [chunk_record(c) for c in chunks]
+        self._store.append(records)
+        for rec, c in zip(records, chunks):
+            self._jsonl.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._bm25.add(c.text)
+            self._digest.update(
+                f"{c.chunk_id}\0{c.section}\0{c.start_line}\0{c.end_line}\0{rec['content_hash']}".encode("utf-8")
+            )
+        self._raw.write(np.ascontiguousarray(embs, dtype=np.float32).tobytes())
+
+        self.dim = embs.shape[1]
+        self.count += len(chunks)
+        self._add_vectors(embs)
+
+    def _add_vectors(self, embs: np.ndarray) -> None:
+        if self._needs_training:
+            self._sample(embs)
+            return
+        if self.index is None:
+            self.index = new_faiss_index(self.params, self.dim)
+        self.index.add(embs)
+
+    @property
+    def _needs_training(self) -> bool:
+        return self.params.index_type in TRAINED_INDEX_TYPES
+
+    def _sample(self, embs: np.ndarray) -> None:
+        # reservoir sampling (algorithm R) over the stream, so the training
+        # sample is uniform over the corpus and not just its first files;
+        # self.count already includes this batch
+        size = self.params.train_size
+        if self._reservoir is None:
+            self._reservoir = np.empty((size, self.dim), dtype=np.float32)
+        seen = self.count - len(embs)
+
+        fill = max(0, min(size - seen, len(embs)))
+        self._reservoir[seen : seen + fill] = embs[:fill]
+
+        positions = np.arange(seen + fill, self.count)
+        slots = self._rng.integers(0, positions + 1)
+        keep = slots < size
+        # a slot drawn twice ends up with the later vector, as in the
+        # one-at-a-time algorithm
+        self._reservoir[slots[keep]] = embs[fill:][keep]
+
+    def _train_and_add(self, block_rows: int = 65_536) -> None:
+        sample = self._reservoir[: min(self.count, self.params.train_size)]
+        self.index = new_faiss_index(self.params, self.dim)
+        self.index.train(sample)
+        self._reservoir = None
+
+        raw = np.memmap(self._raw_path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+        for lo in range(0, self.count, block_rows):
+            self.index.add(np.ascontiguousarray(raw[lo : lo + block_rows]))
+        del raw
+
+    def _write_embeddings(self, block_rows: int = 65_536) -> None:
+        raw = np.memmap(self._raw_path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+        out = np.lib.format.open_memmap(
+            _tmp_path(EMBEDDINGS_PATH), mode="w+", dtype=np.float32, shape=(self.count, self.dim)
+        )
+        for lo in range(0, self.count, block_rows):
+            out[lo : lo + block_rows] = raw[lo : lo + block_rows]
+        out.flush()
+        del raw, out
+        self._raw_path.unlink()
+
+    def commit(self, model_name: str, chunking: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if self.count == 0:
+            self.abort()
+            raise RuntimeError("Chunking produced zero chunks. Check your docs content.")
+        self.params = resolve_index_params(self.params, self.count, self.dim)
+
+        self._store.close()
+        self._jsonl.close()
+        self._raw.close()
+        if self._needs_training:
+            self._train_and_add()
+        self._bm25.write(_tmp_path(BM25_DIR))
+        self._write_embeddings()
+        import_faiss().write_index(self.index, str(_tmp_path(INDEX_PATH)))
+
+        meta: Dict[str, Any] = {
+            "embed_model": model_name,
+            "dim": self.dim,
+            "chunks": self.count,
+            "index": asdict(self.params),
+        }
+        if chunking:
+            meta["chunking"] = chunking
+        # same model, index settings and chunks always give the same id;
+        # query caches are keyed on it
+        build_hash = hashlib.sha256(json.dumps(meta, sort_keys=True).encode("utf-8"))
+        build_hash.update(self._digest.digest())
+        meta["build_id"] = build_hash.hexdigest()[:16]
+        _tmp_path(BUILD_META_PATH).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+        # the retriever reloads when the chunk store manifest changes, so
+        # everything it reads alongside the store goes in before it
+        for path in [INDEX_PATH, EMBEDDINGS_PATH, BUILD_META_PATH]:
+            os.replace(_tmp_path(path), path)
+        swap_in_store(_tmp_path(BM25_DIR), BM25_DIR)
+        swap_in_store(_tmp_path(CHUNK_STORE_DIR), CHUNK_STORE_DIR)
+        os.replace(_tmp_path(CHUNKS_PATH), CHUNKS_PATH)
+        return meta
+
+    def abort(self) -> None:
+        self._jsonl.close()
+        self._raw.close()
+        self._raw_path.unlink(missing_ok=True)
+        for d in [_tmp_path(CHUNK_STORE_DIR), _tmp_path(BM25_DIR)]:
+            shutil.rmtree(d, ignore_errors=True)
+
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq_fp16", "sq_int8", "pq")
+
+# types that must see a training sample before vectors can be added
+TRAINED_INDEX_TYPES = ("ivf_flat", "ivf_pq", "sq_int8", "pq")
+
+# types that store approximate codes instead of the float32 vectors
+QUANTIZED_INDEX_TYPES = ("ivf_pq", "sq_fp16", "sq_int8", "pq")
+
+
+@dataclass
+class IndexParams:
+    """
+    Index type plus its build and default query parameters.
+    None fields are sized from the corpus by resolve_index_params.
+    rerank makes the retriever rescore candidates of quantized indexes
+    with the exact float32 vectors in embeddings.npy.
+    """
+    index_type: str = "flat"
+    nlist: Optional[int] = None
+    pq_m: Optional[int] = None
+    pq_nbits: Optional[int] = None
+    hnsw_m: int = 32
+    ef_construction: int = 80
+    nprobe: int = 8
+    ef_search: int = 64
+    train_size: int = 50_000
+    seed: int = 42
+    rerank: bool = False
+
+
+def resolve_index_params(params: IndexParams, n: int, dim: int) -> IndexParams:
+    if params.index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {params.index_type}. Choose one of {INDEX_TYPES}.")
+
+    n_train = min(n, params.train_size)
+
+    # ~4 * sqrt(n) lists, with at least 39 training points per list
+    nlist = params.nlist or max(1, min(int(4 * np.sqrt(n)), n_train // 39))
+
+    # largest sub-quantizer count up to dim / 4 that divides dim
+    pq_m = params.pq_m or next(m for m in range(min(64, max(1, dim // 4)), 0, -1) if dim % m == 0)
+
+    # PQ training needs at least 2**nbits points
+    pq_nbits = params.pq_nbits or max(1, min(8, int(np.log2(max(n_train, 2)))))
+
+    return replace(params, nlist=nlist, pq_m=pq_m, pq_nbits=pq_nbits)
+
+
+def _training_sample(embs: np.ndarray, size: int, seed: int) -> np.ndarray:
+    if len(embs) <= size:
+        return embs
+    rows = np.random.default_rng(seed).choice(len(embs), size=size, replace=False)
+    return embs[np.sort(rows)]
+
+
+def new_faiss_index(params: IndexParams, dim: int) -> Any:
+    """Empty, untrained index for resolved params."""
+    faiss = import_faiss()
+    if params.index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif params.index_type == "ivf_flat":
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, params.nlist, faiss.METRIC_INNER_PRODUCT)
+    elif params.index_type == "ivf_pq":
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFPQ(
+            quantizer, dim, params.nlist, params.pq_m, params.pq_nbits, faiss.METRIC_INNER_PRODUCT
+        )
+    elif params.index_type == "sq_fp16":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    elif params.index_type == "sq_int8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    elif params.index_type == "pq":
+        index = faiss.IndexPQ(dim, params.pq_m, params.pq_nbits, faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.IndexHNSWFlat(dim, params.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = params.ef_construction
+    return index
+
+
+def build_faiss_index(embs: np.ndarray, params: Optional[IndexParams] = None) -> Any:
     dim = embs.shape[1]
-    index = faiss.IndexFlatIP(dim)
+    params = resolve_index_params(params or IndexParams(), len(embs), dim)
+    index = new_faiss_index(params, dim)
+
+    if not index.is_trained:
+        index.train(_training_sample(embs, params.train_size, params.seed))
     index.add(embs)
     return index
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the knowledge base FAISS index.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="re-embed every chunk instead of reusing embeddings of unchanged chunks",
+    )
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists, sized from the corpus by default")
+    parser.add_argument("--pq-m", type=int, default=None, help="PQ sub-quantizers, must divide the dimension")
+    parser.add_argument("--pq-nbits", type=int, default=None)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-construction", type=int, default=80)
+    parser.add_argument("--nprobe", type=int, default=8, help="default IVF lists probed per query")
+    parser.add_argument("--ef-search", type=int, default=64, help="default HNSW search breadth")
+    parser.add_argument(
+        "--rerank",
+        action="store_true",
+        help="rescore candidates of quantized indexes with the exact float32 embeddings",
+    )
+    parser.add_argument(
+        "--train-size",
+        type=int,
+        default=50_000,
+        help="IVF, PQ and int8 indexes train on a uniform sample of this many vectors of the stream",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="processes reading and chunking files; 1 chunks in-process",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=128,
+        help="chunks embedded and appended per batch; bounds peak memory",
+    )
+    parser.add_argument("--threads", type=int, default=None, help="torch threads used for embedding")
+    parser.add_argument("--target-chars", type=int, default=900, help="chunk size in characters")
+    parser.add_argument("--overlap-chars", type=int, default=120, help="characters carried into the next chunk")
+    return parser.parse_args()
+
+
+def chunk_file(path: Path, target_chars: int = 900, overlap_chars: int = 120) -> List[Chunk]:
+    txt = path.read_text(encoding="utf-8")
+    return chunk_markdown(
+        txt,
+        source_file=str(path.as_posix()),
+        target_chars=target_chars,
+        overlap_chars=overlap_chars,
+    )
+
+
+def iter_chunked_files(
+    paths: List[Path],
+    workers: int,
+    target_chars: int = 900,
+    overlap_chars: int = 120,
+) -> Iterator[Tuple[Path, List[Chunk]]]:
+    """
+    Reads and chunks files in a process pool, yielding them in path order.
+    At most two files per worker are in flight, so finished chunks never
+    pile up ahead of the embedding stage.
+    """
+    if workers <= 1:
+        for path in paths:
+            yield path, chunk_file(path, target_chars, overlap_chars)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        queue = iter(paths)
+        in_flight: Deque[Tuple[Path, Future]] = deque(
+            (path, pool.submit(chunk_file, path, target_chars, overlap_chars))
+            for path in islice(queue, workers * 2)
+        )
+        while in_flight:
+            path, future = in_flight.popleft()
+            nxt = next(queue, None)
+            if nxt is not None:
+                in_flight.append((nxt, pool.submit(chunk_file, nxt, target_chars, overlap_chars)))
+            yield path, future.result()
+
+
+def iter_batches(files: Iterator[Tuple[Path, List[Chunk]]], batch_size: int) -> Iterator[List[Chunk]]:
+    batch: List[Chunk] = []
+    for path, chunks in files:
+        print(str(path.as_posix()), "chunks", len(chunks))
+        for c in chunks:
+            batch.append(c)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
 def main() -> None:
+    args = parse_args()
     ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
 
-    files = read_text_files(KB_DIR)
-    if not files:
+    paths = list_markdown_files(KB_DIR)
+    if not paths:
         raise RuntimeError(f"No markdown files found under {KB_DIR}")
 
-    all_chunks: List[Chunk] = []
-    for path, txt in files:
-        rel = str(path.as_posix())
-        chunks = chunk_markdown(
-            txt,
-            source_file=rel,
-            target_chars=900,
-            overlap_chars=120,
-            )
-        print(rel, "chunks", len(chunks))
-        all_chunks.extend(chunks)
-
-
-    if not all_chunks:
-        raise RuntimeError("Chunking produced zero chunks. Check your docs content.")
-
-    texts = [c.text for c in all_chunks]
-
     # Default model is local and free to run
     model_name = os.environ.get("EMBED_MODEL", "all-MiniLM-L6-v2")
 
-    embs = build_embeddings(model_name, texts)
-
-    index = build_faiss_index(embs)
-
-    faiss.write_index(index, str(INDEX_PATH))
-    save_chunks_jsonl(all_chunks, CHUNKS_PATH)
+    cache = {} if args.full else load_embedding_cache(model_name)
+    embedder = BatchEmbedder(model_name, cache, batch_size=args.batch_size, threads=args.threads)
+
+    writer = ArtifactWriter(
+        IndexParams(
+            index_type=args.index_type,
+            nlist=args.nlist,
+            pq_m=args.pq_m,
+            pq_nbits=args.pq_nbits,
+            hnsw_m=args.hnsw_m,
+            ef_construction=args.ef_construction,
+            nprobe=args.nprobe,
+            ef_search=args.ef_search,
+            train_size=args.train_size,
+            rerank=args.rerank,
+        )
+    )
+
+    try:
+        chunked = iter_chunked_files(paths, args.workers, args.target_chars, args.overlap_chars)
+        for batch in iter_batches(chunked, args.batch_size):
+            writer.add(batch, embedder([c.text for c in batch]))
+    except BaseException:
+        writer.abort()
+        raise
+
+    meta = writer.commit(model_name, {"target_chars": args.target_chars, "overlap_chars": args.overlap_chars})
 
     print("Knowledge base build complete")
-    print(f"Chunks: {len(all_chunks)}")
-    print(f"Index: {INDEX_PATH}")
-    print(f"Metadata: {CHUNKS_PATH}")
+    print(f"Chunks: {meta['chunks']}")
+    print(f"Embeddings reused: {embedder.reused}")
+    print(f"Embeddings recomputed: {embedder.recomputed}")
+    print(f"Index: {INDEX_PATH} ({meta['index']['index_type']})")
+    print(f"Metadata: {CHUNK_STORE_DIR} (export {CHUNKS_PATH})")
+    print(f"Lexical index: {BM25_DIR}")
     print(f"Embed model: {model_name}")
 
 
@@ -0,0 +1,193 @@
+"""
+Compact on-disk chunk metadata.
+
+One directory per build:
+
+    manifest.json                 chunk count and column list, written last
+    <col>.bin + <col>.offsets.npy UTF-8 blob and int64 offsets per string column
+    <col>.npy                     int32 columns
+    content_hash.npy              fixed width sha256 hex digests
+    <col>.codes.npy + .values.json per-row int32 codes for filterable columns
+
+Readers memory-map every file, so opening a store costs the same for six docs
+or six million chunks, and a lookup only touches the rows FAISS returned.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+STRING_COLUMNS = ("chunk_id", "text", "source_file", "section")
+INT_COLUMNS = ("start_line", "end_line")
+# columns retrieval can filter on, also stored dictionary-encoded
+CATEGORY_COLUMNS = ("source_file", "section")
+MANIFEST_NAME = "manifest.json"
+
+
+class ChunkStoreWriter:
+    """Append chunk records batch by batch; close() writes the index files."""
+
+    def __init__(self, out_dir: Path) -> None:
+        self.out_dir = out_dir
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        self._blobs: Dict[str, BinaryIO] = {
+            col: (out_dir / f"{col}.bin").open("wb") for col in STRING_COLUMNS
+        }
+        self._offsets: Dict[str, List[int]] = {col: [0] for col in STRING_COLUMNS}
+        self._ints: Dict[str, List[int]] = {col: [] for col in INT_COLUMNS}
+        self._hashes: List[str] = []
+        self._dicts: Dict[str, Dict[str, int]] = {col: {} for col in CATEGORY_COLUMNS}
+        self._codes: Dict[str, List[int]] = {col: [] for col in CATEGORY_COLUMNS}
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> None:
+        for rec in records:
+            for col in STRING_COLUMNS:
+                data = str(rec.get(col, "")).encode("utf-8")
+                self._blobs[col].write(data)
+                self._offsets[col].append(self._offsets[col][-1] + len(data))
+            for col in INT_COLUMNS:
+                self._ints[col].append(int(rec[col]))
+            for col in CATEGORY_COLUMNS:
+                values = self._dicts[col]
+                self._codes[col].append(values.setdefault(str(rec.get(col, "")), len(values)))
+            self._hashes.append(str(rec.get("content_hash", "")))
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def close(self) -> int:
+        for col, f in self._blobs.items():
+            f.close()
+            np.save(self.out_dir / f"{col}.offsets.npy", np.array(self._offsets[col], dtype=np.int64))
+        for col, values in self._ints.items():
+            np.save(self.out_dir / f"{col}.npy", np.array(values, dtype=np.int32))
+        np.save(self.out_dir / "content_hash.npy", np.array(self._hashes, dtype="S64"))
+        for col in CATEGORY_COLUMNS:
+            np.save(self.out_dir / f"{col}.codes.npy", np.array(self._codes[col], dtype=np.int32))
+            (self.out_dir / f"{col}.values.json").write_text(
+                json.dumps(list(self._dicts[col]), ensure_ascii=False), encoding="utf-8"
+            )
+
+        manifest = {
+            "chunks": len(self._hashes),
+            "string_columns": list(STRING_COLUMNS),
+            "int_columns": list(INT_COLUMNS),
+            "category_columns": list(CATEGORY_COLUMNS),
+        }
+        (self.out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        return len(self._hashes)
+
+
+def write_chunk_store(records: Iterable[Dict[str, Any]], out_dir: Path) -> int:
+    writer = ChunkStoreWriter(out_dir)
+    writer.append(records)
+    return writer.close()
+
+
+def swap_in_store(tmp_dir: Path, store_dir: Path) -> None:
+    """Replace store_dir with a fully written tmp_dir."""
+    old_dir = store_dir.with_name(store_dir.name + ".old")
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if store_dir.exists():
+        os.replace(store_dir, old_dir)
+    os.replace(tmp_dir, store_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+class _StringColumn:
+    def __init__(self, store_dir: Path, col: str) -> None:
+        self.offsets = np.load(store_dir / f"{col}.offsets.npy", mmap_mode="r")
+        blob_path = store_dir / f"{col}.bin"
+        if blob_path.stat().st_size > 0:
+            self.blob: Any = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            self.blob = np.empty(0, dtype=np.uint8)
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i] : self.offsets[i + 1]].tobytes().decode("utf-8")
+
+
+class ChunkStore:
+    """
+    Read side of the store. Indexing returns the same dict a chunks.jsonl
+    line holds, so it can stand in for the list from load_chunks().
+    """
+
+    def __init__(self, store_dir: Path) -> None:
+        manifest_path = store_dir / MANIFEST_NAME
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"No chunk store at {store_dir}")
+
+        self.store_dir = store_dir
+        self.manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        self._strings = {col: _StringColumn(store_dir, col) for col in STRING_COLUMNS}
+        self._ints = {col: np.load(store_dir / f"{col}.npy", mmap_mode="r") for col in INT_COLUMNS}
+        self._hashes = np.load(store_dir / "content_hash.npy", mmap_mode="r")
+        self._categories: Dict[str, Tuple[List[str], np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return int(self.manifest["chunks"])
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if i < 0 or i >= len(self):
+            raise IndexError(i)
+        rec: Dict[str, Any] = {col: self._strings[col][i] for col in STRING_COLUMNS}
+        for col in INT_COLUMNS:
+            rec[col] = int(self._ints[col][i])
+        rec["content_hash"] = self._hashes[i].decode("ascii")
+        return rec
+
+    def get_many(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self[i] for i in ids]
+
+    def text(self, i: int) -> str:
+        return self._strings["text"][i]
+
+    def content_hashes(self) -> List[str]:
+        return [h.decode("ascii") for h in self._hashes]
+
+    def _category(self, col: str) -> Tuple[List[str], np.ndarray]:
+        if col not in self._categories:
+            values_path = self.store_dir / f"{col}.values.json"
+            if values_path.exists():
+                values = json.loads(values_path.read_text(encoding="utf-8"))
+                codes = np.load(self.store_dir / f"{col}.codes.npy", mmap_mode="r")
+            else:
+                # stores written before dictionary encoding: decode once
+                lookup: Dict[str, int] = {}
+                codes = np.array(
+                    [lookup.setdefault(self._strings[col][i], len(lookup)) for i in range(len(self))],
+                    dtype=np.int32,
+                )
+                values = list(lookup)
+            self._categories[col] = (values, codes)
+        return self._categories[col]
+
+    def filter_mask(
+        self,
+        source_files: Optional[Sequence[str]] = None,
+        sections: Optional[Sequence[str]] = None,
+    ) -> np.ndarray:
+        """
+        Boolean mask over chunk ids. A source matches by full path or file
+        name (runbooks.md); sections match exactly. Empty filters match all.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if source_files:
+            wanted = set(source_files)
+            mask &= self._matching("source_file", lambda v: v in wanted or v.rsplit("/", 1)[-1] in wanted)
+        if sections:
+            wanted_sections = set(sections)
+            mask &= self._matching("section", lambda v: v in wanted_sections)
+        return mask
+
+    def _matching(self, col: str, match: Callable[[str], bool]) -> np.ndarray:
+        values, codes = self._category(col)
+        return np.isin(codes, [code for code, v in enumerate(values) if match(v)])
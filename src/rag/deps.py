@@ -0,0 +1,27 @@
+"""
+Heavy dependencies, imported on first use.
+
+faiss and sentence_transformers (which pulls in torch) take seconds to
+import. Importing them here, inside functions, keeps --help, cache hits and
+light imports such as format_citation from paying for them.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+
+def import_faiss() -> Any:
+    try:
+        import faiss  # type: ignore
+    except Exception as e:
+        raise RuntimeError("faiss import failed. Install faiss-cpu.") from e
+    return faiss
+
+
+def import_sentence_transformers() -> Any:
+    try:
+        import sentence_transformers  # type: ignore
+    except Exception as e:
+        raise RuntimeError("sentence-transformers import failed. Install sentence-transformers.") from e
+    return sentence_transformers
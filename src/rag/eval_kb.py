@@ -0,0 +1,250 @@
+"""
+Retrieval quality and latency evaluation for the knowledge base.
+
+The gold set (eval/gold_questions.jsonl) pairs questions with the line
+ranges of docs/knowledge_base that answer them. It lives outside the
+knowledge base so it is never indexed. A retrieved chunk counts as a hit
+when it comes from the expected file and overlaps the expected lines, so
+the gold set stays valid when chunk size or overlap change.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shlex
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.rag.ask_kb import BUILD_META_PATH, CHUNK_STORE_DIR, INDEX_PATH, LEXICAL_WEIGHT, Retriever, format_citation
+from src.rag.chunk_store import MANIFEST_NAME
+from src.rag.query_cache import QueryCache
+
+
+GOLD_PATH = Path(__file__).resolve().parent / "eval" / "gold_questions.jsonl"
+REPORT_PATH = Path("artifacts/reports/kb_eval.json")
+
+
+def load_gold(path: Path) -> List[Dict[str, Any]]:
+    gold: List[Dict[str, Any]] = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                gold.append(json.loads(line))
+    return gold
+
+
+def is_hit(ch: Dict[str, Any], expected: Dict[str, Any]) -> bool:
+    source = str(ch.get("source_file", ""))
+    if source != expected["source_file"] and not source.endswith("/" + expected["source_file"]):
+        return False
+    lo, hi = expected["lines"]
+    return int(ch.get("start_line", 0)) <= hi and int(ch.get("end_line", 0)) >= lo
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+def score_question(
+    retrieved: List[Any],
+    expected: List[Dict[str, Any]],
+    k_values: List[int],
+) -> Dict[str, Any]:
+    """First relevant rank, reciprocal rank and recall at each k for one question."""
+    hit_ranks: List[Optional[int]] = []
+    for exp in expected:
+        rank = next((r for r, (_, ch) in enumerate(retrieved, start=1) if is_hit(ch, exp)), None)
+        hit_ranks.append(rank)
+
+    found = [r for r in hit_ranks if r is not None]
+    first = min(found) if found else None
+    return {
+        "first_relevant_rank": first,
+        "reciprocal_rank": 1.0 / first if first else 0.0,
+        "recall": {
+            str(k): sum(1 for r in hit_ranks if r is not None and r <= k) / len(expected) for k in k_values
+        },
+    }
+
+
+def evaluate(
+    retriever: Retriever,
+    gold: List[Dict[str, Any]],
+    k_values: List[int],
+    repeat: int,
+    retrieve_kwargs: Dict[str, Any],
+) -> Dict[str, Any]:
+    top_k = max(k_values)
+
+    # the model loads on the first query; time it apart from steady state
+    started = time.perf_counter()
+    retriever.retrieve(gold[0]["question"], top_k=top_k, **retrieve_kwargs)
+    first_query_ms = (time.perf_counter() - started) * 1000
+
+    latencies: List[float] = []
+    per_question: List[Dict[str, Any]] = []
+    for _ in range(repeat):
+        per_question = []
+        for item in gold:
+            started = time.perf_counter()
+            retrieved = retriever.retrieve(item["question"], top_k=top_k, **retrieve_kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+            scored = score_question(retrieved, item["expected"], k_values)
+            scored["question"] = item["question"]
+            scored["top_citations"] = [format_citation(ch) for _, ch in retrieved[:3]]
+            per_question.append(scored)
+
+    n = len(per_question)
+    return {
+        "questions": n,
+        "recall_at_k": {
+            str(k): round(sum(q["recall"][str(k)] for q in per_question) / n, 4) for k in k_values
+        },
+        "mrr": round(sum(q["reciprocal_rank"] for q in per_question) / n, 4),
+        "query_latency": percentiles(latencies),
+        "first_query_ms": round(first_query_ms, 3),
+        "stage_latency": retriever.latency.summary(),
+        "per_question": per_question,
+    }
+
+
+def time_builds(runs: int, build_args: List[str]) -> Dict[str, Any]:
+    """Wall time of python -m src.rag.build_kb, run as a subprocess runs times."""
+    times: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "src.rag.build_kb", *build_args], check=True, capture_output=True)
+        times.append((time.perf_counter() - started) * 1000)
+    return {"args": build_args, **percentiles(times)}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def print_comparison(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    print(f"\nAgainst baseline {baseline.get('git_commit')} ({baseline.get('build', {}).get('build_id')})")
+    for k, value in report["recall_at_k"].items():
+        old = baseline.get("recall_at_k", {}).get(k)
+        if old is not None:
+            print(f"  recall@{k:<3} {old:.4f} -> {value:.4f}  ({value - old:+.4f})")
+    if "mrr" in baseline:
+        print(f"  mrr        {baseline['mrr']:.4f} -> {report['mrr']:.4f}  ({report['mrr'] - baseline['mrr']:+.4f})")
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        old = baseline.get("query_latency", {}).get(key)
+        if old is not None:
+            print(f"  query {key:<6} {old:.3f} -> {report['query_latency'][key]:.3f}")
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(x) for x in value.split(",") if x]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate knowledge base retrieval against the gold question set.")
+    parser.add_argument("--gold", type=Path, default=GOLD_PATH)
+    parser.add_argument("--k", type=_int_list, default=[1, 3, 5, 10], help="cutoffs for recall@k; the largest is top_k")
+    parser.add_argument("--min-score", type=float, default=0.30)
+    parser.add_argument("--no-dedupe", action="store_true")
+    parser.add_argument("--lexical-weight", type=float, default=LEXICAL_WEIGHT)
+    parser.add_argument("--nprobe", type=int, default=None)
+    parser.add_argument("--ef-search", type=int, default=None)
+    parser.add_argument("--rerank", action="store_true", help="evaluate with the cross-encoder re-rank stage")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the gold set for latency percentiles")
+    parser.add_argument(
+        "--build-runs",
+        type=int,
+        default=0,
+        help="run build_kb this many times first and report build latency",
+    )
+    parser.add_argument(
+        "--build-args",
+        default="",
+        help='arguments for build_kb, e.g. "--target-chars 700 --overlap-chars 100"',
+    )
+    parser.add_argument("--baseline", type=Path, default=None, help="earlier report to print deltas against")
+    parser.add_argument("--out", type=Path, default=REPORT_PATH)
+    args = parser.parse_args()
+
+    build_latency = time_builds(args.build_runs, shlex.split(args.build_args)) if args.build_runs else None
+
+    if not INDEX_PATH.exists() or not (CHUNK_STORE_DIR / MANIFEST_NAME).exists():
+        raise RuntimeError("Index not found. Run python -m src.rag.build_kb first.")
+
+    gold = load_gold(args.gold)
+    if not gold:
+        raise RuntimeError(f"No questions in {args.gold}")
+
+    # caching would turn every pass after the first into lookups
+    retriever = Retriever(cache=QueryCache(max_embeddings=0, max_results=0))
+    settings = {
+        "min_score": args.min_score,
+        "dedupe_by_source": not args.no_dedupe,
+        "lexical_weight": args.lexical_weight,
+        "nprobe": args.nprobe,
+        "ef_search": args.ef_search,
+        "rerank": args.rerank,
+    }
+    result = evaluate(retriever, gold, sorted(args.k), args.repeat, settings)
+
+    build_meta: Dict[str, Any] = {}
+    if BUILD_META_PATH.exists():
+        build_meta = json.loads(BUILD_META_PATH.read_text(encoding="utf-8"))
+
+    report: Dict[str, Any] = {
+        "git_commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "gold": str(args.gold),
+        "build": {
+            "build_id": build_meta.get("build_id"),
+            "embed_model": build_meta.get("embed_model"),
+            "chunks": build_meta.get("chunks"),
+            "chunking": build_meta.get("chunking"),
+            "index": build_meta.get("index"),
+        },
+        "settings": {"top_k": max(args.k), **settings},
+        "build_latency": build_latency,
+        **result,
+    }
+
+    print(f"questions {report['questions']}  build {report['build']['build_id']}")
+    print("  ".join(f"recall@{k} {v:.3f}" for k, v in report["recall_at_k"].items()) + f"  mrr {report['mrr']:.3f}")
+    lat = report["query_latency"]
+    print(f"query p50 {lat['p50_ms']:.2f}ms  p95 {lat['p95_ms']:.2f}ms  p99 {lat['p99_ms']:.2f}ms")
+    if build_latency:
+        print(f"build p50 {build_latency['p50_ms']:.0f}ms  p95 {build_latency['p95_ms']:.0f}ms")
+    misses = [q["question"] for q in report["per_question"] if q["first_relevant_rank"] is None]
+    if misses:
+        print("no relevant chunk retrieved for:")
+        for q in misses:
+            print("  -", q)
+
+    if args.baseline and args.baseline.exists():
+        print_comparison(report, json.loads(args.baseline.read_text(encoding="utf-8")))
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print("wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
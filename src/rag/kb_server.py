@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict
+from urllib.parse import parse_qs, urlparse
+
+from src.rag.ask_kb import QUERY_CACHE_PATH, Retriever, format_citation
+from src.rag.query_cache import QueryCache
+from src.rag.rerank import DEFAULT_RERANK_MODEL, CrossEncoderReranker
+
+
+def _results_payload(question: str, retrieved, elapsed_ms: float) -> Dict[str, Any]:
+    return {
+        "question": question,
+        "elapsed_ms": round(elapsed_ms, 3),
+        "results": [
+            {
+                "rank": rank,
+                "score": score,
+                "cite": format_citation(ch),
+                "chunk": ch,
+            }
+            for rank, (score, ch) in enumerate(retrieved, start=1)
+        ],
+    }
+
+
+def make_handler(retriever: Retriever) -> type:
+    class KnowledgeBaseHandler(BaseHTTPRequestHandler):
+        """
+        GET  /health
+        GET  /query?q=how+is+churn+calculated&top_k=8&min_score=0.30&dedupe=true
+        POST /query_batch  {"questions": [...], "top_k": 8, "min_score": 0.30, "dedupe": true}
+
+        Both accept source / section filters: repeated source=runbooks.md
+        and section=... query parameters, or "source_files" / "sections"
+        lists in the POST body, and rerank=true / "rerank": true for the
+        cross-encoder stage.
+        """
+
+        def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+
+            if url.path == "/health":
+                retriever.maybe_reload()
+                payload = {
+                    "status": "ok",
+                    "chunks": retriever.num_chunks,
+                    "cache": retriever.cache.stats(),
+                    "latency": retriever.latency.summary(),
+                }
+                if retriever.reranker is not None:
+                    payload["rerank"] = retriever.reranker.stats()
+                self._send_json(200, payload)
+                return
+
+            if url.path != "/query":
+                self._send_json(404, {"error": f"unknown path {url.path}"})
+                return
+
+            question = params.get("q", [""])[0].strip()
+            if not question:
+                self._send_json(400, {"error": "missing q parameter"})
+                return
+
+            try:
+                top_k = int(params.get("top_k", ["8"])[0])
+                min_score = float(params.get("min_score", ["0.30"])[0])
+            except ValueError as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            dedupe = params.get("dedupe", ["true"])[0].lower() not in ("0", "false", "no")
+            rerank = params.get("rerank", ["false"])[0].lower() in ("1", "true", "yes")
+
+            started = time.perf_counter()
+            try:
+                retrieved = retriever.retrieve(
+                    question,
+                    top_k=top_k,
+                    min_score=min_score,
+                    dedupe_by_source=dedupe,
+                    source_files=params.get("source"),
+                    sections=params.get("section"),
+                    rerank=rerank,
+                )
+            except RuntimeError as e:
+                self._send_json(503, {"error": str(e)})
+                return
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            self._send_json(200, _results_payload(question, retrieved, elapsed_ms))
+
+        def do_POST(self) -> None:
+            url = urlparse(self.path)
+            if url.path != "/query_batch":
+                self._send_json(404, {"error": f"unknown path {url.path}"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", "0"))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                questions = [str(q) for q in body.get("questions", [])]
+                top_k = int(body.get("top_k", 8))
+                min_score = float(body.get("min_score", 0.30))
+                dedupe = bool(body.get("dedupe", True))
+                rerank = bool(body.get("rerank", False))
+                source_files = [str(x) for x in body.get("source_files") or []]
+                sections = [str(x) for x in body.get("sections") or []]
+            except (ValueError, AttributeError, TypeError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+
+            started = time.perf_counter()
+            try:
+                batches = retriever.retrieve_batch(
+                    questions,
+                    top_k=top_k,
+                    min_score=min_score,
+                    dedupe_by_source=dedupe,
+                    source_files=source_files,
+                    sections=sections,
+                    rerank=rerank,
+                )
+            except RuntimeError as e:
+                self._send_json(503, {"error": str(e)})
+                return
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            self._send_json(
+                200,
+                {
+                    "elapsed_ms": round(elapsed_ms, 3),
+                    "answers": [
+                        _results_payload(q, retrieved, elapsed_ms / len(questions))
+                        for q, retrieved in zip(questions, batches)
+                    ],
+                },
+            )
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return KnowledgeBaseHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve knowledge base retrieval over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-size", type=int, default=4096, help="ranked results kept in memory")
+    parser.add_argument(
+        "--cache-path",
+        type=Path,
+        default=QUERY_CACHE_PATH,
+        help="persist the query cache here on shutdown and reload it on start",
+    )
+    parser.add_argument(
+        "--rerank-model",
+        default=os.environ.get("RERANK_MODEL"),
+        help=f"cross-encoder for rerank=true queries, loaded on first use (default {DEFAULT_RERANK_MODEL})",
+    )
+    parser.add_argument("--rerank-top-n", type=int, default=20, help="candidates scored by the cross-encoder")
+    parser.add_argument(
+        "--rerank-budget-ms",
+        type=float,
+        default=150.0,
+        help="per-query cross-encoder budget, over it the bi-encoder order is served",
+    )
+    args = parser.parse_args()
+
+    cache = QueryCache(max_embeddings=args.cache_size, max_results=args.cache_size, path=args.cache_path)
+    # the cross-encoder itself loads on the first rerank=true query
+    reranker = CrossEncoderReranker(
+        args.rerank_model,
+        top_n=args.rerank_top_n,
+        budget_ms=args.rerank_budget_ms,
+    )
+    retriever = Retriever(cache=cache, reranker=reranker)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(retriever))
+
+    print(f"Knowledge base server on http://{args.host}:{args.port}")
+    print(f"Chunks: {retriever.num_chunks}")
+    print(f"Embed model: {retriever.model_name}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        cache.save()
+
+
+if __name__ == "__main__":
+    main()
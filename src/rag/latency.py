@@ -0,0 +1,60 @@
+"""
+Rolling per-stage latency samples for the retriever.
+
+Each stage keeps its most recent samples in a bounded deque, so percentiles
+describe current behaviour and memory stays flat in a long-running server.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator
+
+import numpy as np
+
+
+class LatencyRecorder:
+    def __init__(self, max_samples: int = 2048) -> None:
+        self.max_samples = max_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, ms: float) -> None:
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.max_samples)
+            samples.append(ms)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - started) * 1000)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """count, p50_ms, p95_ms and p99_ms per stage."""
+        with self._lock:
+            snapshot = {stage: list(samples) for stage, samples in self._samples.items()}
+
+        report: Dict[str, Dict[str, Any]] = {}
+        for stage, samples in snapshot.items():
+            if not samples:
+                continue
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            report[stage] = {
+                "count": len(samples),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+            }
+        return report
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
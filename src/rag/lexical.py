@@ -0,0 +1,137 @@
+"""
+BM25 inverted index over chunk text.
+
+Built next to the FAISS index by build_kb. Postings are stored as flat arrays
+and memory-mapped, so a query only reads the postings of its own terms:
+
+    terms.json            sorted vocabulary, position = term id
+    postings.offsets.npy  int64, term id -> slice of the postings arrays
+    postings.docs.npy     int32 chunk ids, grouped by term
+    postings.tf.npy       int32 term frequencies, aligned with docs
+    doc_len.npy           int32 tokens per chunk
+    stats.json            chunk count, average length, k1 and b
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by can do does for from how in is it of on or our
+    the this that to was we what when where which who why with you
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    # keeps snake_case identifiers such as subscription_status whole
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+class Bm25Builder:
+    def __init__(self) -> None:
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_len: List[int] = []
+
+    def add(self, text: str) -> int:
+        doc_id = len(self._doc_len)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            docs, tfs = self._postings.setdefault(term, (array("i"), array("i")))
+            docs.append(doc_id)
+            tfs.append(tf)
+        self._doc_len.append(sum(counts.values()))
+        return doc_id
+
+    def write(self, out_dir: Path, k1: float = 1.2, b: float = 0.75) -> None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        terms = sorted(self._postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for i, term in enumerate(terms):
+            offsets[i + 1] = offsets[i] + len(self._postings[term][0])
+
+        docs = np.empty(int(offsets[-1]), dtype=np.int32)
+        tfs = np.empty(int(offsets[-1]), dtype=np.int32)
+        for i, term in enumerate(terms):
+            d, t = self._postings[term]
+            docs[offsets[i] : offsets[i + 1]] = np.frombuffer(d, dtype=np.int32)
+            tfs[offsets[i] : offsets[i + 1]] = np.frombuffer(t, dtype=np.int32)
+
+        doc_len = np.array(self._doc_len, dtype=np.int32)
+
+        np.save(out_dir / "postings.offsets.npy", offsets)
+        np.save(out_dir / "postings.docs.npy", docs)
+        np.save(out_dir / "postings.tf.npy", tfs)
+        np.save(out_dir / "doc_len.npy", doc_len)
+        (out_dir / "terms.json").write_text(json.dumps(terms, ensure_ascii=False), encoding="utf-8")
+
+        stats = {
+            "docs": len(doc_len),
+            "avg_doc_len": float(doc_len.mean()) if len(doc_len) else 0.0,
+            "k1": k1,
+            "b": b,
+        }
+        (out_dir / "stats.json").write_text(json.dumps(stats, indent=2), encoding="utf-8")
+
+
+class Bm25Index:
+    def __init__(self, index_dir: Path) -> None:
+        self.stats = json.loads((index_dir / "stats.json").read_text(encoding="utf-8"))
+        terms = json.loads((index_dir / "terms.json").read_text(encoding="utf-8"))
+        self._term_ids = {t: i for i, t in enumerate(terms)}
+
+        self._offsets = np.load(index_dir / "postings.offsets.npy", mmap_mode="r")
+        self._docs = np.load(index_dir / "postings.docs.npy", mmap_mode="r")
+        self._tfs = np.load(index_dir / "postings.tf.npy", mmap_mode="r")
+        self._doc_len = np.load(index_dir / "doc_len.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return int(self.stats["docs"])
+
+    def search(self, query: str, k: int, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top k chunk ids and BM25 scores, best first. Empty when no term
+        matches. allowed is an optional boolean mask over chunk ids.
+        """
+        n = len(self)
+        k1, b = self.stats["k1"], self.stats["b"]
+        avg_len = self.stats["avg_doc_len"] or 1.0
+
+        doc_parts: List[np.ndarray] = []
+        score_parts: List[np.ndarray] = []
+        for term in set(tokenize(query)):
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+
+            lo, hi = int(self._offsets[term_id]), int(self._offsets[term_id + 1])
+            docs = np.asarray(self._docs[lo:hi])
+            tf = np.asarray(self._tfs[lo:hi], dtype=np.float32)
+            idf = np.log1p((n - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = k1 * (1.0 - b + b * np.asarray(self._doc_len[docs]) / avg_len)
+
+            doc_parts.append(docs)
+            score_parts.append(idf * tf * (k1 + 1.0) / (tf + norm))
+
+        if not doc_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        docs, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts)).astype(np.float32)
+        if allowed is not None:
+            keep = allowed[docs]
+            docs, scores = docs[keep], scores[keep]
+
+        top = np.argsort(-scores, kind="stable")[:k]
+        return docs[top].astype(np.int64), scores[top]
@@ -0,0 +1,146 @@
+"""
+Two-level query cache for the retriever.
+
+Level 1 maps a normalized question to its embedding, level 2 maps a
+normalized question plus retrieval settings to the final ranked results.
+Both are bounded LRUs and both are tagged with the index version they were
+computed against; a new build_kb output clears them.
+"""
+
+from __future__ import annotations
+
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class LRUCache:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def items(self) -> list:
+        with self._lock:
+            return list(self._data.items())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class QueryCache:
+    """
+    Embedding and result cache for one index version.
+
+    With a path, save() writes both levels to disk and the constructor loads
+    them back; entries from another index version are dropped on load.
+    """
+
+    def __init__(
+        self,
+        max_embeddings: int = 2048,
+        max_results: int = 4096,
+        path: Optional[Path] = None,
+    ) -> None:
+        self.embeddings = LRUCache(max_embeddings)
+        self.results = LRUCache(max_results)
+        self.path = path
+        self.version: Optional[str] = None
+        self._saved_version: Optional[str] = None
+
+        if path is not None and path.exists():
+            self._load(path)
+
+    def set_version(self, version: str) -> None:
+        if version == self.version:
+            return
+        # a cache file written against this build is still valid
+        if version != self._saved_version or self.version is not None:
+            self.embeddings.clear()
+            self.results.clear()
+        self.version = version
+
+    def get_embedding(self, query: str) -> Optional[np.ndarray]:
+        return self.embeddings.get(normalize_query(query))
+
+    def put_embedding(self, query: str, vec: np.ndarray) -> None:
+        self.embeddings.put(normalize_query(query), vec)
+
+    def result_key(self, query: str, settings: Hashable) -> Tuple[str, Hashable]:
+        return (normalize_query(query), settings)
+
+    def get_results(self, query: str, settings: Hashable) -> Optional[list]:
+        return self.results.get(self.result_key(query, settings))
+
+    def put_results(self, query: str, settings: Hashable, results: list) -> None:
+        self.results.put(self.result_key(query, settings), results)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "embeddings": len(self.embeddings),
+            "embedding_hits": self.embeddings.hits,
+            "embedding_misses": self.embeddings.misses,
+            "results": len(self.results),
+            "result_hits": self.results.hits,
+            "result_misses": self.results.misses,
+        }
+
+    def save(self) -> None:
+        if self.path is None or self.version is None:
+            return
+        payload = {
+            "version": self.version,
+            "embeddings": self.embeddings.items(),
+            "results": self.results.items(),
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open("wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(self.path)
+
+    def _load(self, path: Path) -> None:
+        try:
+            with path.open("rb") as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return
+
+        self._saved_version = payload.get("version")
+        for key, value in payload.get("embeddings", []):
+            self.embeddings.put(key, value)
+        for key, value in payload.get("results", []):
+            self.results.put(key, value)
@@ -0,0 +1,141 @@
+"""
+Optional cross-encoder re-ranking of the retriever's best candidates.
+
+A cross-encoder reads question and chunk together, so it judges relevance
+far better than the bi-encoder cosine, but it costs one model pass per
+pair. Only the top_n candidates are scored, in batches, and scores are
+cached per (question, chunk text) pair. Each query has a latency budget:
+once the next batch would not fit in it, re-ranking is abandoned and the
+bi-encoder order is kept.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.rag.deps import import_sentence_transformers
+from src.rag.query_cache import LRUCache, normalize_query
+
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker:
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        top_n: int = 20,
+        batch_size: int = 16,
+        budget_ms: float = 150.0,
+        max_cached_pairs: int = 16384,
+    ) -> None:
+        self.model_name = model_name or os.environ.get("RERANK_MODEL", DEFAULT_RERANK_MODEL)
+        self._model: Any = None
+        self._lock = threading.Lock()
+        self.top_n = top_n
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.pair_scores = LRUCache(max_cached_pairs)
+
+        # running estimate of model time per pair, used to decide whether
+        # the next batch still fits in the budget
+        self._ms_per_pair: Optional[float] = None
+        self.fallbacks = 0
+
+    @property
+    def model(self) -> Any:
+        # loaded on the first re-ranked query, so servers that never get one
+        # do not pay for torch
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = import_sentence_transformers().CrossEncoder(self.model_name)
+        return self._model
+
+    def _fits(self, pairs: int, elapsed_ms: float) -> bool:
+        if self._ms_per_pair is None:
+            return elapsed_ms < self.budget_ms
+        return elapsed_ms + pairs * self._ms_per_pair <= self.budget_ms
+
+    def _observe(self, pairs: int, ms: float) -> None:
+        per_pair = ms / pairs
+        if self._ms_per_pair is None:
+            self._ms_per_pair = per_pair
+        else:
+            self._ms_per_pair = 0.8 * self._ms_per_pair + 0.2 * per_pair
+
+    def score(self, query: str, texts: List[str]) -> Optional[np.ndarray]:
+        """
+        Cross-encoder score per text, or None when the budget ran out
+        before every uncached pair was scored.
+        """
+        # a first-use load is not part of the per-pair cost or the budget
+        model = self.model
+        started = time.perf_counter()
+        q_key = normalize_query(query)
+        scores = np.empty(len(texts), dtype=np.float32)
+
+        missing: List[int] = []
+        for i, text in enumerate(texts):
+            cached = self.pair_scores.get((q_key, text))
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i] = cached
+
+        for lo in range(0, len(missing), self.batch_size):
+            batch = missing[lo : lo + self.batch_size]
+            if not self._fits(len(batch), (time.perf_counter() - started) * 1000):
+                self.fallbacks += 1
+                return None
+
+            batch_started = time.perf_counter()
+            predicted = model.predict(
+                [(query, texts[i]) for i in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+            )
+            self._observe(len(batch), (time.perf_counter() - batch_started) * 1000)
+
+            for i, s in zip(batch, np.asarray(predicted, dtype=np.float32).tolist()):
+                scores[i] = s
+                self.pair_scores.put((q_key, texts[i]), s)
+
+        return scores
+
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Tuple[float, Dict[str, Any]]],
+    ) -> Optional[List[Tuple[float, Dict[str, Any]]]]:
+        """
+        The first top_n candidates reordered by cross-encoder score, each
+        paired with that score; None when the budget was exceeded.
+        """
+        head = candidates[: self.top_n]
+        if not head:
+            return []
+
+        scores = self.score(query, [ch.get("text", "") for _, ch in head])
+        if scores is None:
+            return None
+
+        order = np.argsort(-scores, kind="stable")
+        return [(float(scores[i]), head[i][1]) for i in order]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "top_n": self.top_n,
+            "budget_ms": self.budget_ms,
+            "cached_pairs": len(self.pair_scores),
+            "pair_hits": self.pair_scores.hits,
+            "pair_misses": self.pair_scores.misses,
+            "fallbacks": self.fallbacks,
+        }
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 
 from src.agents.config import AgentConfig
-from src.agents import data_validation_agent, financial_analyst_agent, compliance_agent
+from src.workflows.runner import WorkflowRunner, write_report
 
 def main() -> None:
     cfg = AgentConfig()
@@ -12,19 +12,16 @@ def main() -> None:
 
     print("Phase 7 workflow start", datetime.utcnow().isoformat() + "Z")
 
-    v = data_validation_agent.run(cfg)
-    v_path = data_validation_agent.write_report(cfg, v)
-    print("wrote", v_path)
+    result = WorkflowRunner(cfg).run()
+    for agent in result.agents:
+        if agent["report_path"]:
+            print("wrote", agent["report_path"], f"({agent['wall_time_ms']:.0f} ms)")
+        else:
+            print(agent["agent"], "failed:", agent["error"])
+    print("wrote", write_report(cfg, result))
 
-    f = financial_analyst_agent.run(cfg)
-    f_path = financial_analyst_agent.write_report(cfg, f)
-    print("wrote", f_path)
-
-    c = compliance_agent.run(cfg)
-    c_path = compliance_agent.write_report(cfg, c)
-    print("wrote", c_path)
-
-    print("Phase 7 workflow complete")
+    overlap = "overlapped" if result.dbt_tests_overlapped else "sequential"
+    print(f"Phase 7 workflow complete in {result.wall_time_ms:.0f} ms (dbt test {overlap})")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import duckdb
+
+from src.agents import compliance_agent, data_validation_agent, financial_analyst_agent
+from src.agents.config import AgentConfig
+
+# messages DuckDB raises when another process holds the database file
+LOCK_ERRORS = ("Could not set lock on file", "Conflicting lock")
+
+
+@dataclass
+class AgentRun:
+    agent: str
+    status: str
+    wall_time_ms: float
+    report_path: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class WorkflowResult:
+    status: str
+    started_at: str
+    finished_at: str
+    wall_time_ms: float
+    dbt_tests_overlapped: bool
+    dbt_test_wall_time_ms: Optional[float]
+    agents: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _dbt_lock_failure(summary: Dict[str, Any]) -> bool:
+    output = summary.get("stdout_tail", "") + summary.get("stderr_tail", "")
+    return summary.get("returncode") != 0 and any(msg in output for msg in LOCK_ERRORS)
+
+
+def _timed_dbt_tests(cfg: AgentConfig, target: Optional[str]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    summary = data_validation_agent._run_dbt_tests(cfg, target)
+    summary["wall_time_ms"] = (time.perf_counter() - started) * 1000
+    return summary
+
+
+class WorkflowRunner:
+    """
+    Runs the Phase 7 agents against one read-only DuckDB connection.
+
+    Each agent gets its own cursor on that connection and the agents run in
+    a thread pool, so they share the database handle and buffer cache
+    instead of each opening the file. With cfg.dbt_test_target set, dbt
+    test starts first, in its own thread, and overlaps with the SQL checks.
+
+    DuckDB lets several processes read a file but only one write it, so
+    overlap needs a dbt target that opens the database read-only. Without
+    one, dbt test runs before the shared connection opens. If the overlap
+    target still fails on the file lock, the runner repeats dbt test after
+    closing its own connection, so the workflow completes without overlap.
+    """
+
+    def __init__(self, cfg: AgentConfig) -> None:
+        self.cfg = cfg
+
+    def _run_agent(
+        self,
+        name: str,
+        con: duckdb.DuckDBPyConnection,
+        run: Callable[[duckdb.DuckDBPyConnection], Any],
+        write_report: Callable[[AgentConfig, Any], Path],
+    ) -> AgentRun:
+        started = time.perf_counter()
+        cursor = con.cursor()
+        try:
+            result = run(cursor)
+        except Exception as e:
+            return AgentRun(
+                agent=name,
+                status="error",
+                wall_time_ms=(time.perf_counter() - started) * 1000,
+                error=str(e),
+            )
+        finally:
+            cursor.close()
+
+        result.wall_time_ms = (time.perf_counter() - started) * 1000
+        path = write_report(self.cfg, result)
+        return AgentRun(agent=name, status=result.status, wall_time_ms=result.wall_time_ms, report_path=str(path))
+
+    def run(self) -> WorkflowResult:
+        cfg = self.cfg
+        started_at = datetime.utcnow().isoformat() + "Z"
+        started = time.perf_counter()
+
+        # the default target opens the file read-write and would only fail on
+        # the lock held by the shared connection
+        overlapped = cfg.overlap_dbt_tests and cfg.dbt_test_target is not None
+        dbt_future: Future = Future()
+        if not overlapped:
+            # before the runner's connection opens, so dbt gets the file
+            dbt_future.set_result(_timed_dbt_tests(cfg, cfg.target))
+
+        con = duckdb.connect(str(cfg.duckdb_path), read_only=True)
+        workers = max(1, cfg.max_parallel_agents) + 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            if overlapped:
+                dbt_future = pool.submit(_timed_dbt_tests, cfg, cfg.dbt_test_target)
+
+            agents = [
+                pool.submit(
+                    self._run_agent,
+                    "data_validation_agent",
+                    con,
+                    lambda cur: data_validation_agent.run(cfg, cur, dbt_tests=dbt_future),
+                    data_validation_agent.write_report,
+                ),
+                pool.submit(
+                    self._run_agent,
+                    "financial_analyst_agent",
+                    con,
+                    lambda cur: financial_analyst_agent.run(cfg, cur),
+                    financial_analyst_agent.write_report,
+                ),
+                pool.submit(
+                    self._run_agent,
+                    "compliance_agent",
+                    con,
+                    lambda cur: compliance_agent.run(cfg, cur),
+                    compliance_agent.write_report,
+                ),
+            ]
+            runs = [f.result() for f in agents]
+        con.close()
+
+        dbt = dbt_future.result()
+        if _dbt_lock_failure(dbt):
+            # the dbt target could not share the file; test again now that
+            # the runner's connection is closed and fold it into the report
+            overlapped = False
+            dbt = _timed_dbt_tests(cfg, cfg.target)
+            runs[0] = self._rerun_validation(dbt)
+
+        finished_at = datetime.utcnow().isoformat() + "Z"
+        statuses = [r.status for r in runs]
+        status = "pass"
+        if "fail" in statuses or "error" in statuses:
+            status = "fail"
+        elif "warn" in statuses:
+            status = "warn"
+
+        return WorkflowResult(
+            status=status,
+            started_at=started_at,
+            finished_at=finished_at,
+            wall_time_ms=(time.perf_counter() - started) * 1000,
+            dbt_tests_overlapped=overlapped,
+            dbt_test_wall_time_ms=dbt.get("wall_time_ms"),
+            agents=[r.__dict__ for r in runs],
+        )
+
+    def _rerun_validation(self, dbt: Dict[str, Any]) -> AgentRun:
+        done: Future = Future()
+        done.set_result(dbt)
+        started = time.perf_counter()
+        result = data_validation_agent.run(self.cfg, dbt_tests=done)
+        result.wall_time_ms = (time.perf_counter() - started) * 1000 + dbt["wall_time_ms"]
+        path = data_validation_agent.write_report(self.cfg, result)
+        return AgentRun(
+            agent="data_validation_agent",
+            status=result.status,
+            wall_time_ms=result.wall_time_ms,
+            report_path=str(path),
+        )
+
+
+def write_report(cfg: AgentConfig, result: WorkflowResult) -> Path:
+    cfg.reports_dir.mkdir(parents=True, exist_ok=True)
+    out = cfg.reports_dir / "workflow_report.json"
+    out.write_text(json.dumps(result.__dict__, indent=2), encoding="utf-8")
+    return out
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pandas as pd
+
+from src.generate_data import DELTA_TABLES, generate_delta, stream_vectorized
+
+
+def test_generate_delta_keeps_references_and_payment_ratio(tmp_path):
+    full = stream_vectorized(40, out_dir=tmp_path, shard_size=20, as_of=datetime(2026, 1, 1))
+    watermarks = {name: pd.read_csv(tmp_path / f"{name}.csv")["ingestion_date"].max() for name in DELTA_TABLES}
+    last_created = pd.read_csv(tmp_path / "transactions.csv")["created_at"].max()
+
+    delta = generate_delta(3, out_dir=tmp_path)
+
+    accounts = pd.read_csv(tmp_path / "accounts.csv")
+    transactions = pd.read_csv(tmp_path / "transactions.csv")
+    payments = pd.read_csv(tmp_path / "payments.csv")
+    refunds = pd.read_csv(tmp_path / "refunds.csv")
+
+    transaction_ids = set(transactions["transaction_id"])
+    assert transactions["account_id"].isin(set(accounts["account_id"])).all()
+    assert payments["transaction_id"].isin(transaction_ids).all()
+    assert refunds["transaction_id"].isin(transaction_ids).all()
+
+    # every appended transaction brings all of its payment attempts
+    assert delta["transactions"] > 0
+    full_ratio = full["payments"] / full["transactions"]
+    delta_ratio = delta["payments"] / delta["transactions"]
+    assert abs(delta_ratio - full_ratio) < 0.1
+
+    # appended rows are ingested after their table's previous watermark
+    for name, df in {"transactions": transactions, "payments": payments, "refunds": refunds}.items():
+        appended = df.iloc[full[name]:]
+        assert len(appended) == delta[name]
+        assert (appended["ingestion_date"] > watermarks[name]).all()
+
+    # and the new events continue from the last one on disk
+    appended = pd.to_datetime(transactions["created_at"].iloc[full["transactions"]:])
+    assert appended.max() > pd.Timestamp(last_created)
+    assert (appended[appended > pd.Timestamp(last_created)].min() - pd.Timestamp(last_created)) < pd.Timedelta(days=1)